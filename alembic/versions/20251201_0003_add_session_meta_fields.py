@@ -18,13 +18,31 @@ depends_on = None
 
 
 def upgrade():
-    with op.batch_alter_table('sessions') as batch_op:
+    if op.get_bind().dialect.name == 'postgresql':
+        # One ALTER TABLE so the ACCESS EXCLUSIVE lock on sessions is taken once
+        op.execute(
+            "ALTER TABLE sessions "
+            "ADD COLUMN title VARCHAR(255), "
+            "ADD COLUMN user_display_name VARCHAR(128), "
+            "ADD COLUMN user_handle VARCHAR(128)"
+        )
+        return
+    # Nullable adds need no table copy; never let batch mode fall back to one
+    with op.batch_alter_table('sessions', recreate='never') as batch_op:
         batch_op.add_column(sa.Column('title', sa.String(length=255), nullable=True))
         batch_op.add_column(sa.Column('user_display_name', sa.String(length=128), nullable=True))
         batch_op.add_column(sa.Column('user_handle', sa.String(length=128), nullable=True))
 
 
 def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute(
+            "ALTER TABLE sessions "
+            "DROP COLUMN user_handle, "
+            "DROP COLUMN user_display_name, "
+            "DROP COLUMN title"
+        )
+        return
     with op.batch_alter_table('sessions') as batch_op:
         batch_op.drop_column('user_handle')
         batch_op.drop_column('user_display_name')
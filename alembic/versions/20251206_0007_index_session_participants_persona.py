@@ -0,0 +1,40 @@
+"""index session_participants.persona_id
+
+Revision ID: 20251206_0007
+Revises: 20251202_0006
+Create Date: 2025-12-06 00:00:00.000000
+
+"""
+from __future__ import annotations
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '20251206_0007'
+down_revision = '20251202_0006'
+branch_labels = None
+depends_on = None
+
+INDEX_NAME = 'ix_session_participants_persona_id'
+
+
+def upgrade():
+    # The (session_id, persona_id) primary key already serves session_id lookups;
+    # persona_id needs its own index for the ON DELETE CASCADE from personas.
+    if op.get_bind().dialect.name == 'postgresql':
+        # CONCURRENTLY cannot run inside a transaction and does not block writers
+        with op.get_context().autocommit_block():
+            op.execute(
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {INDEX_NAME} "
+                "ON session_participants (persona_id)"
+            )
+        return
+    op.create_index(INDEX_NAME, 'session_participants', ['persona_id'], unique=False)
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {INDEX_NAME}")
+        return
+    op.drop_index(INDEX_NAME, table_name='session_participants')
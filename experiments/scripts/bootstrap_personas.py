@@ -1,35 +1,63 @@
 import argparse
-import json
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
 
 from utils.api_client import assert_backend_ready, load_api_config
-from utils.http_client import build_url, post_json
+from utils.data_loader import dumps_json, load_json, loads_json
+from utils.http_client import JSON_HEADERS, build_url
+
+# Personas created/ingested at the same time
+DEFAULT_WORKERS = 16
 
 
 def load_personas(path: Path) -> List[Dict[str, Any]]:
-    with path.open("r", encoding="utf-8") as f:
-        data = json.load(f)
+    data = load_json(path)
     if not isinstance(data, list):
         raise ValueError("personas 配置需为数组")
     return data
 
 
-def create_persona(base_url: str, headers: Dict[str, str], persona: Dict[str, Any]) -> Dict[str, Any]:
+def _post_json(client: httpx.Client, url: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+    resp = client.post(url, content=dumps_json(payload), headers=JSON_HEADERS)
+    resp.raise_for_status()
+    return loads_json(resp.content) if resp.content else {}
+
+
+def create_persona(client: httpx.Client, base_url: str, persona: Dict[str, Any]) -> Dict[str, Any]:
     url = build_url(base_url, "/api/personas")
-    return post_json(url, persona, headers=headers)
+    return _post_json(client, url, persona)
 
 
-def ingest_background(base_url: str, headers: Dict[str, str], persona_id: int, username: str, background: str) -> Dict[str, Any]:
+def ingest_background(client: httpx.Client, base_url: str, persona_id: int, username: str, background: str) -> Dict[str, Any]:
     url = build_url(base_url, f"/api/personas/{persona_id}/ingest_text", query={"username": username})
     payload = {"text": background}
-    return post_json(url, payload, headers=headers)
+    return _post_json(client, url, payload)
+
+
+def bootstrap_persona(client: httpx.Client, base_url: str, persona: Dict[str, Any]) -> Tuple[Dict[str, Any], Optional[str]]:
+    """Create one persona and ingest its background; return the response and an ingest note."""
+    background = persona.pop("background", None)
+    username = persona.get("username")
+    res = create_persona(client, base_url, persona)
+    persona_id = res.get("id")
+    note = None
+    if background and persona_id and username:
+        try:
+            ingest_background(client, base_url, persona_id, username, background)
+            note = f"ingested background for persona id={persona_id}"
+        except Exception as e:
+            note = f"ingest failed for persona id={persona_id}: {e}"
+    return res, note
 
 
 def main():
     parser = argparse.ArgumentParser(description="预置 Personas 并注入后端")
     parser.add_argument("--api-config", type=str, default="config/api_config.json", help="API 配置文件")
     parser.add_argument("--personas", type=str, default="config/personas.json", help="Personas 配置文件")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="并发创建 persona 的线程数")
     args = parser.parse_args()
 
     api_cfg = load_api_config(Path(args.api_config))
@@ -39,19 +67,14 @@ def main():
 
     personas = load_personas(Path(args.personas))
     created = []
-    for persona in personas:
-        background = persona.pop("background", None)
-        username = persona.get("username")
-        res = create_persona(base_url, headers, persona)
-        persona_id = res.get("id")
-        created.append(res)
-        print(f"[OK] created persona id={persona_id}, name={res.get('name')}")
-        if background and persona_id and username:
-            try:
-                ingest_background(base_url, headers, persona_id, username, background)
-                print(f"  └─ ingested background for persona id={persona_id}")
-            except Exception as e:
-                print(f"  └─ ingest failed for persona id={persona_id}: {e}")
+    # One pooled client shared by all workers (httpx.Client is thread-safe)
+    with httpx.Client(headers=headers, timeout=30.0) as client, \
+            ThreadPoolExecutor(max_workers=max(1, args.workers)) as executor:
+        for res, note in executor.map(lambda p: bootstrap_persona(client, base_url, p), personas):
+            created.append(res)
+            print(f"[OK] created persona id={res.get('id')}, name={res.get('name')}")
+            if note:
+                print(f"  └─ {note}")
 
     print(f"\n总计创建 {len(created)} 个 persona")
 
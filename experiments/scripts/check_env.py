@@ -5,13 +5,37 @@
 """
 
 import sys
-import json
-import logging
+import asyncio
 from pathlib import Path
+import argparse
+import functools
+import importlib.util
+import logging
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover - reported by check_python_env
+    httpx = None
+
+try:
+    import asyncpg
+except ImportError:  # pragma: no cover - reported by check_python_env
+    asyncpg = None
+
+from utils.data_loader import load_json
+from utils.paths import EXP_DIR
 
 logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
 logger = logging.getLogger(__name__)
 
+# 配置文件在 experiments/config 目录下
+DEFAULT_API_CONFIG = EXP_DIR / 'config/api_config.json'
+
+
+def _load_api_cfg(path: str) -> dict:
+    """读取 api_config.json；main() 只调用一次，并把结果传给各项检查"""
+    return load_json(Path(path))
+
 
 def check_python_env():
     """检查 Python 版本和依赖"""
@@ -29,15 +53,16 @@ def check_python_env():
         ('pyyaml', 'yaml'),
         ('httpx', 'httpx'),
         ('sqlalchemy', 'sqlalchemy'),
+        ('asyncpg', 'asyncpg'),
         ('pymilvus', 'pymilvus'),
     ]
     
     missing = []
     for pkg_name, import_name in imports_to_check:
-        try:
-            __import__(import_name)
+        # find_spec only locates the package, so heavy ones like pymilvus are not imported
+        if importlib.util.find_spec(import_name) is not None:
             logger.info(f"✓ {pkg_name}")
-        except ImportError:
+        else:
             logger.warning(f"✗ {pkg_name} 未安装")
             missing.append(pkg_name)
     
@@ -54,7 +79,6 @@ def check_config_files():
     logger.info("\n检查配置文件...")
     
     # 配置文件在 experiments/config 目录下，不是 scripts/config
-    exp_dir = Path(__file__).parent.parent
     required_files = [
         'config/api_config.json',
         'config/rag_eval_config.json',
@@ -64,7 +88,7 @@ def check_config_files():
     
     missing = []
     for file_path in required_files:
-        full_path = exp_dir / file_path
+        full_path = EXP_DIR / file_path
         if full_path.exists():
             logger.info(f"✓ {file_path}")
         else:
@@ -78,73 +102,56 @@ def check_config_files():
     return True
 
 
-def check_backend_api(config_path: Path = None):
+async def check_backend_api(cfg: dict):
     """检查后端 API 可用性"""
     logger.info("\n检查后端 API...")
     
-    if config_path is None:
-        # 配置文件在 experiments/config 目录下
-        config_path = Path(__file__).parent.parent / 'config/api_config.json'
-    
-    try:
-        with open(config_path) as f:
-            cfg = json.load(f)
-    except Exception as e:
-        logger.error(f"无法读取配置文件: {e}")
-        return False
-    
     base_url = cfg.get('base_url', 'http://localhost:8000')
     health_path = cfg.get('health_path', '/health')
     
-    import urllib.request
     health_url = base_url.rstrip('/') + health_path
     
+    if httpx is None:
+        logger.error("✗ httpx 未安装，无法检查后端 API")
+        return False
+    
     try:
-        req = urllib.request.Request(health_url, method='GET')
-        with urllib.request.urlopen(req, timeout=5) as resp:
-            if resp.status == 200:
-                logger.info(f"✓ 后端 API: {base_url}")
-                return True
-            else:
-                logger.error(f"✗ 后端返回状态码 {resp.status}")
-                return False
+        async with httpx.AsyncClient(timeout=5) as client:
+            resp = await client.get(health_url)
+        if resp.status_code == 200:
+            logger.info(f"✓ 后端 API: {base_url}")
+            return True
+        else:
+            logger.error(f"✗ 后端返回状态码 {resp.status_code}")
+            return False
     except Exception as e:
         logger.error(f"✗ 无法连接后端: {e}")
         logger.info(f"  启动后端: ./scripts/start_backend.sh")
         return False
 
 
-def check_database(config_path: Path = None):
+async def check_database(cfg: dict):
     """检查 PostgreSQL 连接"""
     logger.info("\n检查 PostgreSQL...")
     
-    if config_path is None:
-        config_path = Path(__file__).parent.parent / 'config/api_config.json'
-    
-    try:
-        with open(config_path) as f:
-            cfg = json.load(f)
-    except Exception as e:
-        logger.error(f"无法读取配置文件: {e}")
-        return False
-    
     dsn = cfg.get('postgres', {}).get('dsn', '')
     if not dsn:
         logger.warning("PostgreSQL DSN 未配置")
         return False
     
+    if asyncpg is None:
+        logger.error("✗ asyncpg 未安装，无法检查 PostgreSQL")
+        return False
+    
     try:
-        import asyncio
-        from sqlalchemy.ext.asyncio import create_async_engine
-        
-        async def test_db():
-            engine = create_async_engine(dsn, echo=False)
-            async with engine.begin() as conn:
-                result = await conn.execute("SELECT 1")
-                return result.scalar() == 1
+        # One bare connection is enough for a liveness probe; asyncpg expects a plain libpq DSN
+        conn = await asyncpg.connect(dsn.replace("postgresql+asyncpg://", "postgresql://", 1), timeout=3)
+        try:
+            ok = await conn.fetchval("SELECT 1") == 1
+        finally:
+            await conn.close()
         
-        result = asyncio.run(test_db())
-        if result:
+        if ok:
             logger.info(f"✓ PostgreSQL 连接正常")
             return True
         else:
@@ -156,28 +163,39 @@ def check_database(config_path: Path = None):
         return False
 
 
-def check_milvus(config_path: Path = None):
-    """检查 Milvus 连接"""
+async def check_milvus(cfg: dict, deep: bool = False):
+    """检查 Milvus 连接；默认只探测端口，deep=True 时走完整的 pymilvus 握手"""
     logger.info("\n检查 Milvus...")
     
-    if config_path is None:
-        config_path = Path(__file__).parent.parent / 'config/api_config.json'
-    
-    try:
-        with open(config_path) as f:
-            cfg = json.load(f)
-    except Exception as e:
-        logger.error(f"无法读取配置文件: {e}")
-        return False
-    
     host = cfg.get('milvus', {}).get('host', 'localhost')
     port = cfg.get('milvus', {}).get('port', 19530)
     
+    if not deep:
+        try:
+            _, writer = await asyncio.wait_for(asyncio.open_connection(host, int(port)), timeout=2)
+            writer.close()
+            await writer.wait_closed()
+            logger.info(f"✓ Milvus 端口可达 ({host}:{port})")
+            return True
+        except (OSError, asyncio.TimeoutError) as e:
+            logger.error(f"✗ Milvus 不可达: {e!r}")
+            logger.info(f"  启动 Milvus: ./scripts/milvus_control.sh start")
+            return False
+    
     try:
         from pymilvus import connections
+    except ImportError:
+        logger.error("✗ pymilvus 未安装，无法检查 Milvus")
+        return False
+    
+    def _probe():
         connections.connect(alias='default', host=host, port=port, pool_size=1)
-        logger.info(f"✓ Milvus 连接正常 ({host}:{port})")
         connections.disconnect(alias='default')
+    
+    try:
+        # pymilvus 的连接是阻塞调用，放到线程中以免拖住其他检查
+        await asyncio.to_thread(_probe)
+        logger.info(f"✓ Milvus 连接正常 ({host}:{port})")
         return True
     except Exception as e:
         logger.error(f"✗ Milvus 连接失败: {e}")
@@ -185,20 +203,10 @@ def check_milvus(config_path: Path = None):
         return False
 
 
-def check_llm_api(config_path: Path = None):
+def check_llm_api(cfg: dict):
     """检查 LLM API 配置"""
     logger.info("\n检查 LLM API...")
     
-    if config_path is None:
-        config_path = Path(__file__).parent.parent / 'config/api_config.json'
-    
-    try:
-        with open(config_path) as f:
-            cfg = json.load(f)
-    except Exception as e:
-        logger.error(f"无法读取配置文件: {e}")
-        return False
-    
     llm_cfg = cfg.get('llm', {})
     
     if not llm_cfg.get('api_key'):
@@ -213,20 +221,10 @@ def check_llm_api(config_path: Path = None):
         return False
 
 
-def check_embedding_api(config_path: Path = None):
+def check_embedding_api(cfg: dict):
     """检查 Embedding API 配置"""
     logger.info("\n检查 Embedding API...")
     
-    if config_path is None:
-        config_path = Path(__file__).parent.parent / 'config/api_config.json'
-    
-    try:
-        with open(config_path) as f:
-            cfg = json.load(f)
-    except Exception as e:
-        logger.error(f"无法读取配置文件: {e}")
-        return False
-    
     emb_cfg = cfg.get('embedding', {})
     
     if not emb_cfg.get('api_key'):
@@ -241,15 +239,44 @@ def check_embedding_api(config_path: Path = None):
         return False
 
 
+async def run_all_optional(cfg: dict, checks):
+    """并发执行所有网络类检查，总耗时取决于最慢的一项"""
+    return await asyncio.gather(
+        *(check_fn(cfg) for _, check_fn in checks),
+        return_exceptions=True,
+    )
+
+
 def main():
     """运行所有检查"""
+    parser = argparse.ArgumentParser(description="Mul-in-One 实验环境检查")
+    parser.add_argument(
+        "--deep-check",
+        action="store_true",
+        help="对 Milvus 做完整的 pymilvus 连接握手（默认只探测端口）",
+    )
+    args = parser.parse_args()
+    
     logger.info("="*60)
     logger.info("Mul-in-One 实验环境检查")
     logger.info("="*60)
     
+    # 前置检查失败时，后续的配置/网络检查注定失败，直接退出，不再做无谓的探测
+    if not check_python_env():
+        logger.error("\n✗ Python 环境检查失败，请先安装缺失依赖")
+        return 1
+    if not check_config_files():
+        logger.error("\n✗ 配置文件缺失，请先补全 config/ 下的配置")
+        return 2
+    try:
+        cfg = _load_api_cfg(str(DEFAULT_API_CONFIG))
+    except Exception as e:
+        logger.error(f"无法读取配置文件: {e}")
+        return 2
+    
+    results = {"Python 环境": True, "配置文件": True}
+    
     checks = [
-        ("Python 环境", check_python_env),
-        ("配置文件", check_config_files),
         ("LLM API", check_llm_api),
         ("Embedding API", check_embedding_api),
     ]
@@ -257,26 +284,25 @@ def main():
     optional_checks = [
         ("后端 API", check_backend_api),
         ("PostgreSQL", check_database),
-        ("Milvus", check_milvus),
+        ("Milvus", functools.partial(check_milvus, deep=args.deep_check)),
     ]
     
-    results = {}
-    
     logger.info("\n必需检查:")
     for name, check_fn in checks:
         try:
-            results[name] = check_fn()
+            results[name] = check_fn(cfg)
         except Exception as e:
             logger.error(f"检查失败 {name}: {e}")
             results[name] = False
     
     logger.info("\n可选检查（运行脚本前需要）:")
-    for name, check_fn in optional_checks:
-        try:
-            results[name] = check_fn()
-        except Exception as e:
-            logger.error(f"检查失败 {name}: {e}")
+    outcomes = asyncio.run(run_all_optional(cfg, optional_checks))
+    for (name, _), outcome in zip(optional_checks, outcomes):
+        if isinstance(outcome, Exception):
+            logger.error(f"检查失败 {name}: {outcome}")
             results[name] = False
+        else:
+            results[name] = outcome
     
     # Summary
     logger.info("\n" + "="*60)
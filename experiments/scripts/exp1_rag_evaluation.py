@@ -1,130 +1,208 @@
 import argparse
-import json
+import asyncio
 import logging
 import random
-import statistics
 from pathlib import Path
-from typing import Dict, List
+from typing import Awaitable, Dict, List, TypeVar
 
-from utils.api_client import assert_backend_ready, load_api_config, BackendAPIClient
-from utils.data_loader import load_qa_dataset
-from utils.metrics import recall_at_k, mrr, ndcg_at_k
+import numpy as np
+
+from utils.api_client import assert_backend_ready, load_api_config, AsyncBackendAPIClient
+from utils.data_loader import iter_qa_dataset, load_json, qa_answer, qa_query
+from utils.metrics import recall_at_ks, mrr, ndcg_at_k
 from utils.visualizer import save_json, print_table
+from utils.paths import resolve_exp_path
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
 
+T = TypeVar("T")
+
+# Upper bound on in-flight ingest/retrieve requests against the backend
+DEFAULT_CONCURRENCY = 64
+# Documents sent per /ingest_text_batch request
+INGEST_BATCH_SIZE = 100
+# Chunks the backend embeds and flushes at a time within one batch request
+INGEST_COMMIT_EVERY = 50
+# Prefix of the source tag attached to every ingested evaluation document
+SOURCE_PREFIX = "qa_dataset_"
+# Retrieved responses buffered ahead of the scorer
+SCORE_QUEUE_SIZE = 256
+
+
+async def _bounded(sem: asyncio.Semaphore, coro: Awaitable[T]) -> T:
+    async with sem:
+        return await coro
 
-def evaluate(
+
+async def evaluate_async(
     config: Dict,
-    api_client: BackendAPIClient,
+    api_client: AsyncBackendAPIClient,
     username: str = "test_user",
-    persona_id: int = 1
+    persona_id: int = 1,
+    concurrency: int = DEFAULT_CONCURRENCY
 ) -> Dict:
     """
     真实 RAG 评估：调用后端 RAG 检索接口，评估检索质量。
     
     流程：
-    1. 为指定 Persona 摄取评估数据集
-    2. 遍历 QA 对，调用后端检索 API
-    3. 计算 Recall@K, MRR, NDCG 等指标
+    1. 流式读取评估数据集，并为指定 Persona 分批摄取
+    2. 并发遍历 QA 对，每个查询以最大 K 调用一次后端检索 API
+    3. 在同一检索结果的前 K 项上计算 Recall@K, MRR, NDCG 等指标
     """
     logger.info("Starting real RAG evaluation against backend...")
     
-    # Load QA dataset
-    qa_file = Path(config["dataset"]["qa_file"])
-    if not qa_file.is_absolute():
-        qa_file = Path(__file__).parent.parent / qa_file
-    
-    qa_data = load_qa_dataset(qa_file)
-    logger.info(f"Loaded {len(qa_data)} QA pairs from {qa_file}")
+    # Resolve QA dataset path
+    qa_file = resolve_exp_path(config["dataset"]["qa_file"])
     
     top_k_values = config["dataset"].get("top_k_values", [1, 3, 5])
+    sem = asyncio.Semaphore(concurrency)
     
-    # Ingest dataset documents as RAG background
-    logger.info(f"Ingesting {len(qa_data)} documents into persona {persona_id}...")
+    # Documents from earlier runs are already embedded; only ingest what is missing
+    try:
+        existing_sources = await api_client.list_ingested_sources(persona_id=persona_id, username=username)
+    except Exception as e:
+        logger.warning(f"Failed to list existing sources, ingesting everything: {e}")
+        existing_sources = set()
+    logger.info(f"Persona {persona_id} already has {len(existing_sources)} sources")
+    
+    # Stream the dataset: each batch is ingested as soon as it fills, before the rest is parsed,
+    # and only the lightweight (idx, query, relevant_docs) tuples are kept for retrieval.
+    # All batches target the same persona collection, so send them one after another:
+    # the backend serializes writes per collection anyway.
+    logger.info(f"Streaming QA pairs from {qa_file} into persona {persona_id}...")
+    queries = []
+    skipped_count = 0
+    batch: List[Dict[str, str]] = []
+    batch_idx = 0
+    total_count = 0
     ingested_count = 0
-    for qa_pair in qa_data:
-        doc_text = f"Question: {qa_pair.get('question', '')}\nAnswer: {qa_pair.get('answer', '')}"
-        doc_id = qa_pair.get("id", f"doc_{ingested_count}")
+    
+    async def flush_batch() -> None:
+        nonlocal batch, batch_idx, ingested_count
         try:
-            api_client.ingest_text(
+            await api_client.ingest_text_batch(
                 persona_id=persona_id,
                 username=username,
-                text=doc_text,
-                source=f"qa_dataset_{doc_id}"
+                items=batch,
+                commit_every=INGEST_COMMIT_EVERY
             )
-            ingested_count += 1
+            ingested_count += len(batch)
         except Exception as e:
-            logger.warning(f"Failed to ingest document {doc_id}: {e}")
+            logger.warning("Failed to ingest batch %d (%d documents): %s", batch_idx, len(batch), e)
+        batch = []
+        batch_idx += 1
     
-    logger.info(f"Ingested {ingested_count}/{len(qa_data)} documents")
+    for idx, qa_pair in enumerate(iter_qa_dataset(qa_file)):
+        total_count += 1
+        query = qa_query(qa_pair)
+        source = f"{SOURCE_PREFIX}{qa_pair.get('id', f'doc_{idx}')}"
+        if source in existing_sources:
+            skipped_count += 1
+        else:
+            batch.append({
+                "text": f"Question: {query}\nAnswer: {qa_answer(qa_pair)}",
+                "source": source,
+            })
+        # Frozen once per query and reused by every k
+        correct = frozenset(qa_pair.get("relevant_docs", ()))
+        if query and correct:
+            queries.append((idx, query, correct))
+        if len(batch) >= INGEST_BATCH_SIZE:
+            await flush_batch()
+    if batch:
+        await flush_batch()
+    
+    logger.info(f"Ingested {ingested_count}/{total_count} documents ({skipped_count} already present)")
     
     # Perform retrieval evaluation
     results = {
         "experiment": config["experiment"],
-        "total_queries": len(qa_data),
+        "total_queries": total_count,
         "metrics_by_k": {}
     }
     
-    for k in top_k_values:
-        logger.info(f"Evaluating retrieval with top_k={k}...")
-        
-        recalls = []
-        mrrs = []
-        ndcgs = []
-        
-        for idx, qa_pair in enumerate(qa_data):
-            if idx % 10 == 0:
-                logger.info(f"  Processing query {idx}/{len(qa_data)}...")
-            
-            query = qa_pair.get("question", "")
-            correct_doc_ids = set(qa_pair.get("relevant_docs", []))
-            
-            if not correct_doc_ids or not query:
-                continue
-            
-            try:
-                # Call backend RAG retrieve API
-                resp = api_client.retrieve_documents(
+    # Retrieve once per query at the largest k; smaller k values are scored on prefixes.
+    # Retrievals feed a bounded queue and are scored as they arrive, so scoring overlaps
+    # with the requests still in flight.
+    top_k_max = max(top_k_values)
+    logger.info(f"Retrieving top_k={top_k_max} for {len(queries)} queries...")
+    queue: asyncio.Queue = asyncio.Queue(maxsize=SCORE_QUEUE_SIZE)
+    scores_by_k = {k: ([], [], []) for k in top_k_values}
+    
+    async def retrieve_one(idx: int, query: str, correct_doc_ids: frozenset) -> None:
+        try:
+            resp = await _bounded(
+                sem,
+                api_client.retrieve_documents(
                     persona_id=persona_id,
                     username=username,
                     query=query,
-                    top_k=k
-                )
-                
-                # Extract retrieved document IDs from response
-                retrieved_docs = resp.get("documents", [])
-                retrieved_ids = set(
-                    doc.get("metadata", {}).get("source", f"doc_{i}").split("_")[-1]
-                    for i, doc in enumerate(retrieved_docs)
-                )
-                
-                # Calculate metrics
-                r = recall_at_k(correct_doc_ids, retrieved_ids, k)
-                m = mrr(correct_doc_ids, retrieved_ids)
-                n = ndcg_at_k(correct_doc_ids, retrieved_ids, k)
-                
+                    top_k=top_k_max
+                ),
+            )
+        except Exception as e:
+            logger.warning("Failed to retrieve for query %d: %s", idx, e)
+            return
+        await queue.put((idx, correct_doc_ids, resp))
+    
+    async def produce() -> None:
+        try:
+            await asyncio.gather(*(retrieve_one(*q) for q in queries))
+        finally:
+            await queue.put(None)
+    
+    async def consume() -> None:
+        while (item := await queue.get()) is not None:
+            idx, correct_doc_ids, resp = item
+            # Ordered document IDs, recovered from the source tag set at ingest time
+            retrieved_ids = [
+                (passage.get("source") or f"doc_{i}").removeprefix(SOURCE_PREFIX)
+                for i, passage in enumerate(resp.get("passages", []))
+            ]
+            relevance = [1 if doc_id in correct_doc_ids else 0 for doc_id in retrieved_ids]
+            # One walk over the ranking covers every cutoff
+            recall_by_k = recall_at_ks(correct_doc_ids, retrieved_ids, scores_by_k)
+            for k, (recalls, mrrs, ndcgs) in scores_by_k.items():
+                top_ids = retrieved_ids[:k]
+                try:
+                    r = recall_by_k[k]
+                    m = mrr(correct_doc_ids, top_ids)
+                    n = ndcg_at_k(relevance[:k], k)
+                except Exception as e:
+                    logger.warning("Failed to score query %d at k=%d: %s", idx, k, e)
+                    continue
                 recalls.append(r)
                 mrrs.append(m)
                 ndcgs.append(n)
-                
-            except Exception as e:
-                logger.warning(f"Failed to retrieve for query {idx}: {e}")
-                continue
-        
+    
+    await asyncio.gather(produce(), consume())
+    
+    for k, (recalls, mrrs, ndcgs) in scores_by_k.items():
         if recalls:
+            recalls_arr = np.asarray(recalls, dtype=np.float64)
             results["metrics_by_k"][f"k={k}"] = {
-                "recall_mean": round(statistics.mean(recalls), 4),
-                "recall_std": round(statistics.stdev(recalls) if len(recalls) > 1 else 0, 4),
-                "mrr_mean": round(statistics.mean(mrrs), 4),
-                "ndcg_mean": round(statistics.mean(ndcgs), 4),
-                "queries_evaluated": len(recalls)
+                "recall_mean": round(float(recalls_arr.mean()), 4),
+                "recall_std": round(float(recalls_arr.std(ddof=1)) if recalls_arr.size > 1 else 0.0, 4),
+                "mrr_mean": round(float(np.mean(mrrs)), 4),
+                "ndcg_mean": round(float(np.mean(ndcgs)), 4),
+                "queries_evaluated": int(recalls_arr.size)
             }
     
     return results
 
 
+async def _run_evaluation(api_cfg: Dict, config: Dict, username: str, persona_id: int, concurrency: int) -> Dict:
+    async with AsyncBackendAPIClient(api_cfg) as api_client:
+        return await evaluate_async(
+            config,
+            api_client,
+            username=username,
+            persona_id=persona_id,
+            concurrency=concurrency
+        )
+
+
 def main():
     parser = argparse.ArgumentParser()
     parser.add_argument("--config", type=str, default="config/rag_eval_config.json")
@@ -147,32 +225,30 @@ def main():
         default=1,
         help="用于评估的 Persona ID"
     )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=DEFAULT_CONCURRENCY,
+        help="并发请求上限"
+    )
     args = parser.parse_args()
 
     if args.seed is not None:
         random.seed(args.seed)
 
     # Load configurations
-    config_path = Path(args.config)
-    if not config_path.is_absolute():
-        config_path = Path(__file__).parent.parent / config_path
+    config_path = resolve_exp_path(args.config)
     
-    with open(config_path, "r", encoding="utf-8") as f:
-        config = json.load(f)
+    config = load_json(config_path)
     
     # Get persona settings from config, with args as override
     persona_config = config.get("persona", {})
     username = args.username if args.username != "eval_user" else persona_config.get("username", args.username)
     persona_id = args.persona_id if args.persona_id != 1 else persona_config.get("persona_id", args.persona_id)
     
-    api_config_path = Path(args.api_config)
-    if not api_config_path.is_absolute():
-        api_config_path = Path(__file__).parent.parent / api_config_path
+    api_config_path = resolve_exp_path(args.api_config)
     api_cfg = load_api_config(api_config_path)
     
-    # Create API client
-    api_client = BackendAPIClient(api_cfg)
-    
     # Check backend readiness (可选，如果检查失败仍继续尝试）
     try:
         logger.info("Checking backend readiness...")
@@ -184,11 +260,14 @@ def main():
     out_file = Path(config["output"]["results_file"])
     out_file.parent.mkdir(parents=True, exist_ok=True)
     
-    results = evaluate(
-        config,
-        api_client,
-        username=username,
-        persona_id=persona_id
+    results = asyncio.run(
+        _run_evaluation(
+            api_cfg,
+            config,
+            username=username,
+            persona_id=persona_id,
+            concurrency=max(1, args.concurrency)
+        )
     )
     
     save_json(results, out_file)
@@ -1,41 +1,99 @@
 import argparse
 import asyncio
-import json
 import logging
 import random
 import time
 from pathlib import Path
 from typing import Dict, List
 
-from utils.api_client import assert_backend_ready, load_api_config, BackendAPIClient
-from utils.data_loader import load_conversations
+import numpy as np
+
+from utils.api_client import assert_backend_ready, load_api_config, AsyncBackendAPIClient
+from utils.data_loader import load_conversations, load_json
 from utils.metrics import gini_coefficient
 from utils.visualizer import save_json, print_table
+from utils.paths import resolve_exp_path
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
 
 
-def evaluate_scheduler(
+# Upper bound on conversations replayed against the backend at the same time
+DEFAULT_CONCURRENCY = 16
+
+
+async def run_conversation(
+    api_client: AsyncBackendAPIClient,
+    sem: asyncio.Semaphore,
+    conv_idx: int,
+    conversation: List[Dict],
+    username: str,
+    persona_ids: List[int]
+) -> List[int]:
+    """Replay one conversation in its own session; return per-message request latencies in ns."""
+    response_times: List[int] = []
+    async with sem:
+        try:
+            # Create session
+            session_resp = await api_client.create_session(
+                username=username,
+                initial_persona_ids=persona_ids
+            )
+            session_id = session_resp.get("session_id")
+            
+            if not session_id:
+                logger.warning("Failed to create session for conversation %d", conv_idx)
+                return response_times
+            
+            # Turns within a conversation stay ordered
+            for turn_idx, turn_data in enumerate(conversation):
+                message = turn_data.get("message", "")
+                
+                if not message:
+                    continue
+                
+                start_ns = time.perf_counter_ns()
+                try:
+                    await api_client.enqueue_message(
+                        session_id=session_id,
+                        content=message,
+                        target_personas=[]  # Let scheduler decide
+                    )
+                    response_times.append(time.perf_counter_ns() - start_ns)
+                    
+                    # Track which personas responded
+                    # (In real scenario, would wait for responses via WebSocket)
+                    # For now, record the request time as a baseline
+                    
+                except Exception as e:
+                    logger.warning("Failed to send message in conversation %d turn %d: %s", conv_idx, turn_idx, e)
+                    continue
+        
+        except Exception as e:
+            logger.warning("Failed to process conversation %d: %s", conv_idx, e)
+    
+    return response_times
+
+
+async def evaluate_scheduler(
     config: Dict,
-    api_client: BackendAPIClient,
-    username: str = "test_user"
+    api_client: AsyncBackendAPIClient,
+    username: str = "test_user",
+    concurrency: int = DEFAULT_CONCURRENCY
 ) -> Dict:
     """
     真实调度器评估：通过后端会话 API 模拟多方对话，评估调度器性能。
     
     流程：
     1. 为每个 Persona 创建或获取记录
-    2. 创建会话并加入各 Persona
+    2. 并发创建会话并加入各 Persona（会话内消息保持顺序）
     3. 按照对话数据集发送消息
     4. 评估参与者分布、响应延迟等指标
     """
     logger.info("Starting real multi-agent scheduler evaluation...")
     
     # Load conversation dataset
-    conv_file = Path(config["dataset"]["conversation_file"])
-    if not conv_file.is_absolute():
-        conv_file = Path(__file__).parent.parent / conv_file
+    conv_file = resolve_exp_path(config["dataset"]["conversation_file"])
     
     conversations = load_conversations(conv_file)
     logger.info(f"Loaded {len(conversations)} conversation sessions")
@@ -57,62 +115,32 @@ def evaluate_scheduler(
     
     # Track participation across all conversations
     participation_counts = {p["name"]: 0 for p in personas_config}
-    response_times = []
-    
-    for conv_idx, conversation in enumerate(conversations):
-        if conv_idx % max(1, len(conversations) // 10) == 0:
-            logger.info(f"Processing conversation {conv_idx}/{len(conversations)}...")
-        
-        try:
-            # Create session
-            session_resp = api_client.create_session(
-                username=username,
-                initial_persona_ids=list(range(1, len(personas_config) + 1))
-            )
-            session_id = session_resp.get("session_id")
-            
-            if not session_id:
-                logger.warning(f"Failed to create session for conversation {conv_idx}")
-                continue
-            
-            # Send messages and track responses
-            for turn_idx, turn_data in enumerate(conversation):
-                message = turn_data.get("message", "")
-                sender = turn_data.get("sender", "user")
-                
-                if not message:
-                    continue
-                
-                # Send message
-                start_time = time.time()
-                try:
-                    msg_resp = api_client.enqueue_message(
-                        session_id=session_id,
-                        content=message,
-                        target_personas=[]  # Let scheduler decide
-                    )
-                    elapsed = time.time() - start_time
-                    response_times.append(elapsed)
-                    
-                    # Track which personas responded
-                    # (In real scenario, would wait for responses via WebSocket)
-                    # For now, record the request time as a baseline
-                    
-                except Exception as e:
-                    logger.warning(f"Failed to send message in conversation {conv_idx} turn {turn_idx}: {e}")
-                    continue
-        
-        except Exception as e:
-            logger.warning(f"Failed to process conversation {conv_idx}: {e}")
-            continue
+    persona_ids = list(range(1, len(personas_config) + 1))
+    sem = asyncio.Semaphore(concurrency)
+    
+    logger.info(f"Replaying {len(conversations)} conversations with concurrency={concurrency}...")
+    per_conversation = await asyncio.gather(
+        *(
+            run_conversation(api_client, sem, conv_idx, conversation, username, persona_ids)
+            for conv_idx, conversation in enumerate(conversations)
+        )
+    )
+    response_ns = np.fromiter(
+        (elapsed for times in per_conversation for elapsed in times),
+        dtype=np.int64,
+    )
     
     # Calculate statistics
-    if response_times:
+    if response_ns.size:
+        t = response_ns.astype(np.float64) * 1e-9
+        p50, p95 = np.quantile(t, [0.5, 0.95])
         results["response_times"] = {
-            "mean_seconds": round(sum(response_times) / len(response_times), 4),
-            "min_seconds": round(min(response_times), 4),
-            "max_seconds": round(max(response_times), 4),
-            "total_messages": len(response_times)
+            "mean_seconds": round(float(t.mean()), 4),
+            "p50_seconds": round(float(p50), 4),
+            "p95_seconds": round(float(p95), 4),
+            "min_seconds": round(float(t.min()), 4),
+            "max_seconds": round(float(t.max()), 4),
+            "total_messages": int(t.size)
         }
     
     # Scheduler fairness (Gini coefficient on participation)
@@ -127,6 +155,16 @@ def evaluate_scheduler(
     return results
 
 
+async def _run_evaluation(api_cfg: Dict, config: Dict, username: str, concurrency: int) -> Dict:
+    async with AsyncBackendAPIClient(api_cfg) as api_client:
+        return await evaluate_scheduler(
+            config,
+            api_client,
+            username=username,
+            concurrency=concurrency
+        )
+
+
 def main():
     parser = argparse.ArgumentParser()
     parser.add_argument("--config", type=str, default="config/scheduler_config.json")
@@ -143,31 +181,29 @@ def main():
         default="eval_user",
         help="用于评估的用户名"
     )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=DEFAULT_CONCURRENCY,
+        help="并发回放的会话数上限"
+    )
     args = parser.parse_args()
 
     if args.seed is not None:
         random.seed(args.seed)
 
     # Load configurations
-    config_path = Path(args.config)
-    if not config_path.is_absolute():
-        config_path = Path(__file__).parent.parent / config_path
+    config_path = resolve_exp_path(args.config)
     
-    with open(config_path, "r", encoding="utf-8") as f:
-        config = json.load(f)
+    config = load_json(config_path)
     
     # Get persona settings from config, with args as override
     persona_config = config.get("persona", {})
     username = args.username if args.username != "eval_user" else persona_config.get("username", args.username)
     
-    api_config_path = Path(args.api_config)
-    if not api_config_path.is_absolute():
-        api_config_path = Path(__file__).parent.parent / api_config_path
+    api_config_path = resolve_exp_path(args.api_config)
     api_cfg = load_api_config(api_config_path)
     
-    # Create API client
-    api_client = BackendAPIClient(api_cfg)
-    
     # Check backend readiness (可选，如果检查失败仍继续尝试）
     try:
         logger.info("Checking backend readiness...")
@@ -179,7 +215,9 @@ def main():
     out_file = Path(config["output"]["results_file"])
     out_file.parent.mkdir(parents=True, exist_ok=True)
     
-    results = evaluate_scheduler(config, api_client, username=username)
+    results = asyncio.run(
+        _run_evaluation(api_cfg, config, username=username, concurrency=max(1, args.concurrency))
+    )
     
     save_json(results, out_file)
     print_table("Scheduler Evaluation Results", results)
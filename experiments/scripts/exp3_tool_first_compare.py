@@ -1,86 +1,225 @@
 import argparse
-import json
+import asyncio
+import contextlib
 import logging
+import os
 import random
-import statistics
 import time
 from pathlib import Path
-from typing import Dict, List
+from typing import Any, Awaitable, BinaryIO, Dict, List, Optional, Tuple, TypeVar
 
-from utils.api_client import assert_backend_ready, load_api_config, BackendAPIClient
-from utils.data_loader import load_qa_dataset
-from utils.visualizer import save_json, print_table
+import numpy as np
+
+from utils.api_client import assert_backend_ready, load_api_config, AsyncBackendAPIClient
+from utils.data_loader import iter_qa_dataset, load_json, qa_query
+from utils.visualizer import jsonl_line, save_json, print_table
+from utils.paths import resolve_exp_path
+
+try:
+    import tiktoken  # type: ignore
+except Exception:  # pragma: no cover - optional
+    tiktoken = None
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
 
+T = TypeVar("T")
+
+
+# Upper bound on in-flight requests per evaluation mode
+DEFAULT_CONCURRENCY = 16
+# Queries per /rag/retrieve_batch request (the backend accepts at most 64)
+RETRIEVE_BATCH_SIZE = 64
+# Token counting: the fast len // 3 heuristic, or exact counts via tiktoken
+DEFAULT_TOKEN_COUNTER = "heuristic"
+DEFAULT_TOKEN_ENCODING = "cl100k_base"
+# Discarded retrievals issued before timing starts (model / connection warm-up)
+DEFAULT_WARMUP_QUERIES = 3
+# Write buffer of the per-query JSONL trace file
+TRACE_BUFFER_SIZE = 1 << 20
+
+
+class _Progress:
+    """Log completed queries roughly every 10%, formatting only when INFO is on."""
+
+    def __init__(self, label: str, total: int) -> None:
+        self.label = label
+        self.total = total
+        self.done = 0
+        self.log_every = max(1, total // 10)
+        self.enabled = logger.isEnabledFor(logging.INFO)
+
+    def advance(self, count: int = 1) -> None:
+        before = self.done
+        self.done += count
+        if self.enabled and self.done // self.log_every != before // self.log_every:
+            logger.info("  %s query %d/%d...", self.label, self.done, self.total)
+
+
+def load_token_encoder(tokens_cfg: Dict) -> Optional[Any]:
+    """tiktoken encoding selected by the ``tokens`` config, or None for the heuristic."""
+    counter = tokens_cfg.get("counter", DEFAULT_TOKEN_COUNTER)
+    if counter == "heuristic":
+        return None
+    if counter != "tiktoken":
+        raise ValueError(f"未知的 token 计数方式: {counter}")
+    if tiktoken is None:
+        raise RuntimeError("缺少 tiktoken，无法使用 tiktoken 计数")
+    return tiktoken.get_encoding(tokens_cfg.get("encoding", DEFAULT_TOKEN_ENCODING))
+
 
-def evaluate_baseline(
-    api_client: BackendAPIClient,
-    qa_dataset: List[Dict],
+async def _count_tokens(encoder: Any, texts: List[str]) -> List[int]:
+    """Token count of each text, encoded as one batch on tiktoken's thread pool."""
+    if not texts:
+        return []
+    encoded = await asyncio.to_thread(
+        encoder.encode_batch, texts, num_threads=os.cpu_count() or 1
+    )
+    return [len(ids) for ids in encoded]
+
+
+async def warm_up(
+    api_client: AsyncBackendAPIClient,
     persona_id: int,
     username: str,
-    top_k: int = 5
+    top_k: int,
+    count: int
+) -> None:
+    """Issue ``count`` untimed retrievals so cold-start cost stays out of the stats."""
+    for _ in range(count):
+        try:
+            await api_client.retrieve_documents(
+                persona_id=persona_id,
+                query="warmup",
+                username=username,
+                top_k=top_k
+            )
+        except Exception as e:
+            logger.warning(f"Warm-up query failed: {e}")
+
+
+async def _bounded(sem: asyncio.Semaphore, coro: Awaitable[T]) -> T:
+    async with sem:
+        return await coro
+
+
+async def evaluate_baseline(
+    api_client: AsyncBackendAPIClient,
+    queries: List[Tuple[int, str]],
+    persona_id: int,
+    username: str,
+    top_k: int = 5,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    encoder: Optional[Any] = None,
+    trace_sink: Optional[BinaryIO] = None
 ) -> Dict:
     """
     Baseline 模式评估：预注入（Pre-injection）
     
-    1. 前置检索所有 QA 的背景文档
+    1. 通过批量检索接口前置检索所有 QA 的背景文档（每批 RETRIEVE_BATCH_SIZE 条，
+       重复的问题只检索一次，结果复用）
     2. 一起发送给 LLM（无额外工具调用）
-    3. 统计 token 消耗和延迟
+    3. 统计 token 消耗和延迟（单条延迟按所在批次耗时均摊）
+    
+    encoder 为 tiktoken 编码器时精确计数，为 None 时使用 len // 3 估算；
+    trace_sink 不为空时逐条写入 JSONL 明细。
     """
     logger.info("Evaluating baseline (pre-injection) mode...")
+    sem = asyncio.Semaphore(concurrency)
     
-    token_counts = []
-    latencies = []
-    
-    for idx, qa_pair in enumerate(qa_dataset):
-        if idx % max(1, len(qa_dataset) // 10) == 0:
-            logger.info(f"  Baseline query {idx}/{len(qa_dataset)}...")
+    async def run_batch(questions: List[str]) -> List[Tuple[int, float]]:
+        # Pre-retrieve documents for the whole batch in one request
+        start = time.perf_counter_ns()
+        results = await api_client.retrieve_documents_batch(
+            persona_id=persona_id,
+            queries=questions,
+            username=username,
+            top_k=top_k
+        )
+        latency_ns = (time.perf_counter_ns() - start) // len(questions)
+        progress.advance(len(questions))
         
-        question = qa_pair.get("question", "")
-        if not question:
-            continue
+        outcomes = []
+        if encoder is not None:
+            # Exact counts: encode every passage and question of the batch at once
+            texts = []
+            for question, resp in zip(questions, results):
+                texts.extend(passage.get("text", "") for passage in resp.get("passages", []))
+                texts.append(question)
+            counts = iter(await _count_tokens(encoder, texts))
+            for _, resp in zip(questions, results):
+                estimated_tokens = sum(next(counts) for _ in resp.get("passages", [])) + next(counts)
+                outcomes.append((estimated_tokens, latency_ns))
+            return outcomes
         
-        try:
-            # Pre-retrieve documents
-            start = time.time()
-            resp = api_client.retrieve_documents(
-                persona_id=persona_id,
-                username=username,
-                query=question,
-                top_k=top_k
-            )
-            
-            documents = resp.get("documents", [])
-            
-            # Estimate token count (rough: ~1.3 chars per token for English/Chinese)
-            context = " ".join(doc.get("page_content", "") for doc in documents)
-            estimated_tokens = len(context) // 3 + len(question) // 3
-            
-            latency = time.time() - start
-            
-            token_counts.append(estimated_tokens)
-            latencies.append(latency)
-            
-        except Exception as e:
-            logger.warning(f"Baseline query {idx} failed: {e}")
+        for question, resp in zip(questions, results):
+            passages = resp.get("passages", [])
+            # Estimate token count (rough: ~1.3 chars per token for English/Chinese).
+            # Length of the space-joined context, summed without building the string.
+            context_len = sum(len(passage.get("text", "")) for passage in passages) + max(0, len(passages) - 1)
+            estimated_tokens = context_len // 3 + len(question) // 3
+            outcomes.append((estimated_tokens, latency_ns))
+        return outcomes
+    
+    # Memoize within the run: questions that repeat (up to whitespace) are
+    # retrieved once and every occurrence reuses that outcome
+    keys = [" ".join(question.split()) for _, question in queries]
+    unique_questions = list(dict.fromkeys(keys))
+    if len(unique_questions) < len(keys):
+        logger.info(f"{len(keys) - len(unique_questions)} repeated questions reuse earlier retrievals")
+    progress = _Progress("Baseline", len(unique_questions))
+    batches = [
+        unique_questions[start:start + RETRIEVE_BATCH_SIZE]
+        for start in range(0, len(unique_questions), RETRIEVE_BATCH_SIZE)
+    ]
+    batch_outcomes = await asyncio.gather(
+        *(_bounded(sem, run_batch(batch)) for batch in batches),
+        return_exceptions=True,
+    )
+    
+    outcome_by_question: Dict[str, Tuple[int, float]] = {}
+    for batch_idx, (batch, outcome) in enumerate(zip(batches, batch_outcomes)):
+        if isinstance(outcome, Exception):
+            logger.warning("Baseline batch %d failed: %s", batch_idx, outcome)
+            continue
+        outcome_by_question.update(zip(batch, outcome))
+    rows = []
+    for (idx, question), key in zip(queries, keys):
+        if key not in outcome_by_question:
             continue
+        estimated_tokens, latency_ns = outcome_by_question[key]
+        rows.append((estimated_tokens, latency_ns))
+        if trace_sink is not None:
+            trace_sink.write(jsonl_line({
+                "mode": "baseline",
+                "idx": idx,
+                "query": question,
+                "estimated_tokens": estimated_tokens,
+                "latency_ns": latency_ns,
+            }))
+    
+    # Columns: estimated tokens, latency (ns)
+    stats = np.asarray(rows, dtype=np.float64).reshape(-1, 2)
+    token_counts, latencies = stats[:, 0], stats[:, 1] * 1e-9
+    n = len(stats)
     
     return {
-        "token_avg": round(statistics.mean(token_counts), 1) if token_counts else 0,
-        "token_std": round(statistics.stdev(token_counts), 1) if len(token_counts) > 1 else 0,
-        "latency_avg_s": round(statistics.mean(latencies), 3) if latencies else 0,
-        "latency_std_s": round(statistics.stdev(latencies), 3) if len(latencies) > 1 else 0,
-        "queries_evaluated": len(token_counts)
+        "token_avg": round(float(token_counts.mean()), 1) if n else 0,
+        "token_std": round(float(token_counts.std(ddof=1)), 1) if n > 1 else 0,
+        "latency_avg_s": round(float(latencies.mean()), 3) if n else 0,
+        "latency_std_s": round(float(latencies.std(ddof=1)), 3) if n > 1 else 0,
+        "queries_evaluated": n
     }
 
 
-def evaluate_tool_first(
-    api_client: BackendAPIClient,
-    qa_dataset: List[Dict],
+async def evaluate_tool_first(
+    api_client: AsyncBackendAPIClient,
+    queries: List[Tuple[int, str]],
     persona_id: int,
-    username: str
+    username: str,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    encoder: Optional[Any] = None,
+    trace_sink: Optional[BinaryIO] = None
 ) -> Dict:
     """
     Tool-First 模式评估：动态工具调用
@@ -88,98 +227,166 @@ def evaluate_tool_first(
     1. LLM 决定是否调用 RAG 工具
     2. 统计实际工具调用次数、token 节省率、延迟
     3. （当前为占位实现，需后端支持工具调用追踪）
+    
+    trace_sink 不为空时，每条 query 完成即写入一行 JSONL 明细。
     """
     logger.info("Evaluating tool-first mode...")
     
+    # Token count of each query (baseline without full retrieval)
+    if encoder is not None:
+        question_tokens = await _count_tokens(encoder, [question for _, question in queries])
+    else:
+        question_tokens = [len(question) // 3 for _, question in queries]
+    
     # Placeholder: simulate tool-first behavior
     # In real scenario, would use backend API to track tool calls
     
-    token_counts = []
-    tool_calls = []
-    latencies = []
+    # One session per concurrency slot, created up front and reused, so the
+    # measured loop is a single enqueue_message call per query
+    session_resps = await asyncio.gather(
+        *(
+            api_client.create_session(username=username, initial_persona_ids=[persona_id])
+            for _ in range(min(concurrency, len(queries)))
+        ),
+        return_exceptions=True,
+    )
+    sessions: asyncio.Queue = asyncio.Queue()
+    for session_resp in session_resps:
+        if isinstance(session_resp, Exception):
+            logger.warning("Failed to create session: %s", session_resp)
+        elif session_resp.get("session_id"):
+            sessions.put_nowait(session_resp["session_id"])
     
-    for idx, qa_pair in enumerate(qa_dataset):
-        if idx % max(1, len(qa_dataset) // 10) == 0:
-            logger.info(f"  Tool-First query {idx}/{len(qa_dataset)}...")
-        
-        question = qa_pair.get("question", "")
-        if not question:
-            continue
-        
+    if queries and sessions.empty():
+        logger.warning("No session available, skipping tool-first evaluation")
+        queries = []
+    
+    async def run_one(idx: int, question: str, estimated_tokens: int) -> Tuple[int, int, int]:
+        session_id = await sessions.get()
         try:
-            # Create session for tool-first interaction
-            session_resp = api_client.create_session(
-                username=username,
-                initial_persona_ids=[persona_id]
-            )
-            session_id = session_resp.get("session_id")
-            
-            if not session_id:
-                logger.warning(f"Failed to create session for query {idx}")
-                continue
-            
             # Send message and measure response
-            start = time.time()
-            msg_resp = api_client.enqueue_message(
+            start = time.perf_counter_ns()
+            await api_client.enqueue_message(
                 session_id=session_id,
                 content=question
             )
-            latency = time.time() - start
-            
-            # Estimate token count (baseline without full retrieval)
-            estimated_tokens = len(question) // 3
-            
-            # Count tool calls (placeholder - would need backend support)
-            tool_call_count = 0
-            
-            token_counts.append(estimated_tokens)
-            tool_calls.append(tool_call_count)
-            latencies.append(latency)
-            
-        except Exception as e:
-            logger.warning(f"Tool-First query {idx} failed: {e}")
+            latency_ns = time.perf_counter_ns() - start
+        finally:
+            sessions.put_nowait(session_id)
+        progress.advance()
+        
+        # Count tool calls (placeholder - would need backend support)
+        tool_call_count = 0
+        if trace_sink is not None:
+            trace_sink.write(jsonl_line({
+                "mode": "tool_first",
+                "idx": idx,
+                "query": question,
+                "estimated_tokens": estimated_tokens,
+                "tool_calls": tool_call_count,
+                "latency_ns": latency_ns,
+            }))
+        return estimated_tokens, tool_call_count, latency_ns
+    
+    progress = _Progress("Tool-First", len(queries))
+    # The session pool bounds the number of in-flight requests
+    outcomes = await asyncio.gather(
+        *(
+            run_one(idx, question, estimated_tokens)
+            for (idx, question), estimated_tokens in zip(queries, question_tokens)
+        ),
+        return_exceptions=True,
+    )
+    
+    rows = []
+    for (idx, _), outcome in zip(queries, outcomes):
+        if isinstance(outcome, Exception):
+            logger.warning("Tool-First query %d failed: %s", idx, outcome)
             continue
+        rows.append(outcome)
+    
+    # Columns: estimated tokens, tool calls, latency (ns)
+    stats = np.asarray(rows, dtype=np.float64).reshape(-1, 3)
+    token_counts, tool_calls, latencies = stats[:, 0], stats[:, 1], stats[:, 2] * 1e-9
+    n = len(stats)
     
     return {
-        "token_avg": round(statistics.mean(token_counts), 1) if token_counts else 0,
-        "token_std": round(statistics.stdev(token_counts), 1) if len(token_counts) > 1 else 0,
-        "latency_avg_s": round(statistics.mean(latencies), 3) if latencies else 0,
-        "latency_std_s": round(statistics.stdev(latencies), 3) if len(latencies) > 1 else 0,
-        "avg_tool_calls": round(statistics.mean(tool_calls), 2) if tool_calls else 0,
-        "queries_evaluated": len(token_counts)
+        "token_avg": round(float(token_counts.mean()), 1) if n else 0,
+        "token_std": round(float(token_counts.std(ddof=1)), 1) if n > 1 else 0,
+        "latency_avg_s": round(float(latencies.mean()), 3) if n else 0,
+        "latency_std_s": round(float(latencies.std(ddof=1)), 3) if n > 1 else 0,
+        "avg_tool_calls": round(float(tool_calls.mean()), 2) if n else 0,
+        "queries_evaluated": n
     }
 
 
-def evaluate(config: Dict, api_client: BackendAPIClient, seed: int, username: str = "eval_user", persona_id: int = 1) -> Dict:
+async def evaluate(
+    config: Dict,
+    api_client: AsyncBackendAPIClient,
+    seed: int,
+    username: str = "eval_user",
+    persona_id: int = 1,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    parallel_modes: bool = False,
+    trace_sink: Optional[BinaryIO] = None
+) -> Dict:
     """
     Tool-First vs Baseline 对比评估
+    
+    parallel_modes=True 时两种模式并发执行，总耗时更短，但二者争用同一后端，
+    延迟指标会互相干扰；默认依次执行。
     """
     logger.info("Starting Tool-First vs Baseline comparison...")
     
     # Load QA dataset
-    qa_file = Path(config["dataset"]["test_cases"])
-    if not qa_file.is_absolute():
-        qa_file = Path(__file__).parent.parent / qa_file
+    qa_file = resolve_exp_path(config["dataset"]["test_cases"])
+    
+    # Stream the dataset once and keep only (index, query) pairs, which is all
+    # both modes need; the full QA dicts are never held in memory together
+    queries = [
+        (idx, question)
+        for idx, question in enumerate(map(qa_query, iter_qa_dataset(qa_file)))
+        if question
+    ]
+    logger.info(f"Loaded {len(queries)} test cases")
+    
+    tokens_cfg = config.get("tokens", {})
+    encoder = load_token_encoder(tokens_cfg)
     
-    qa_dataset = load_qa_dataset(qa_file)
-    logger.info(f"Loaded {len(qa_dataset)} test cases")
+    top_k = config["baseline"].get("top_k", 5)
+    warmup_queries = config["baseline"].get("warmup_queries", DEFAULT_WARMUP_QUERIES)
+    if warmup_queries:
+        logger.info(f"Warming up with {warmup_queries} untimed queries...")
+        await warm_up(api_client, persona_id, username, top_k, warmup_queries)
     
-    # Evaluate both modes
-    baseline_results = evaluate_baseline(
+    baseline_run = evaluate_baseline(
         api_client,
-        qa_dataset,
+        queries,
         persona_id=persona_id,
         username=username,
-        top_k=config["baseline"].get("top_k", 5)
+        top_k=top_k,
+        concurrency=concurrency,
+        encoder=encoder,
+        trace_sink=trace_sink
     )
-    
-    tool_first_results = evaluate_tool_first(
+    tool_first_run = evaluate_tool_first(
         api_client,
-        qa_dataset,
+        queries,
         persona_id=persona_id,
-        username=username
+        username=username,
+        concurrency=concurrency,
+        encoder=encoder,
+        trace_sink=trace_sink
     )
     
+    if parallel_modes:
+        # Overlap both modes' I/O; latencies then include contention between them
+        baseline_results, tool_first_results = await asyncio.gather(baseline_run, tool_first_run)
+    else:
+        # One after another so their latencies do not interfere
+        baseline_results = await baseline_run
+        tool_first_results = await tool_first_run
+    
     # Calculate comparison metrics
     baseline_tokens = baseline_results.get("token_avg", 1)
     tool_first_tokens = tool_first_results.get("token_avg", 1)
@@ -189,6 +396,9 @@ def evaluate(config: Dict, api_client: BackendAPIClient, seed: int, username: st
     return {
         "experiment": config["experiment"],
         "seed": seed,
+        "token_counter": tokens_cfg.get("counter", DEFAULT_TOKEN_COUNTER),
+        "parallel_modes": parallel_modes,
+        "warmup_queries": warmup_queries,
         "baseline": baseline_results,
         "tool_first": tool_first_results,
         "comparison": {
@@ -202,6 +412,34 @@ def evaluate(config: Dict, api_client: BackendAPIClient, seed: int, username: st
     }
 
 
+async def _run_evaluation(
+    api_cfg: Dict,
+    config: Dict,
+    seed: int,
+    username: str,
+    persona_id: int,
+    concurrency: int,
+    parallel_modes: bool,
+    trace_file: Optional[Path] = None
+) -> Dict:
+    with contextlib.ExitStack() as stack:
+        trace_sink = None
+        if trace_file is not None:
+            trace_file.parent.mkdir(parents=True, exist_ok=True)
+            trace_sink = stack.enter_context(trace_file.open("wb", buffering=TRACE_BUFFER_SIZE))
+        async with AsyncBackendAPIClient(api_cfg) as api_client:
+            return await evaluate(
+                config,
+                api_client,
+                seed=seed,
+                username=username,
+                persona_id=persona_id,
+                concurrency=concurrency,
+                parallel_modes=parallel_modes,
+                trace_sink=trace_sink
+            )
+
+
 def main():
     parser = argparse.ArgumentParser()
     parser.add_argument("--config", type=str, default="config/tool_first_config.json")
@@ -224,31 +462,40 @@ def main():
         default=1,
         help="用于评估的 Persona ID"
     )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=DEFAULT_CONCURRENCY,
+        help="并发请求上限"
+    )
+    parser.add_argument(
+        "--parallel-modes",
+        action="store_true",
+        help="Baseline 与 Tool-First 并发执行（更快，但延迟指标会互相干扰）"
+    )
+    parser.add_argument(
+        "--trace-file",
+        type=str,
+        default=None,
+        help="逐条 query 明细输出路径（JSONL，可用 tail -f 实时查看）"
+    )
     args = parser.parse_args()
 
     random.seed(args.seed)
 
     # Load configurations
-    config_path = Path(args.config)
-    if not config_path.is_absolute():
-        config_path = Path(__file__).parent.parent / config_path
+    config_path = resolve_exp_path(args.config)
     
-    with open(config_path, "r", encoding="utf-8") as f:
-        config = json.load(f)
+    config = load_json(config_path)
     
     # Get persona settings from config, with args as override
     persona_config = config.get("persona", {})
     username = args.username if args.username != "eval_user" else persona_config.get("username", args.username)
     persona_id = args.persona_id if args.persona_id != 1 else persona_config.get("persona_id", args.persona_id)
     
-    api_config_path = Path(args.api_config)
-    if not api_config_path.is_absolute():
-        api_config_path = Path(__file__).parent.parent / api_config_path
+    api_config_path = resolve_exp_path(args.api_config)
     api_cfg = load_api_config(api_config_path)
     
-    # Create API client
-    api_client = BackendAPIClient(api_cfg)
-    
     # Check backend readiness (可选，如果检查失败仍继续尝试）
     try:
         logger.info("Checking backend readiness...")
@@ -260,12 +507,17 @@ def main():
     out_file = Path(config["output"]["results_file"])
     out_file.parent.mkdir(parents=True, exist_ok=True)
     
-    results = evaluate(
-        config,
-        api_client,
-        seed=args.seed,
-        username=username,
-        persona_id=persona_id
+    results = asyncio.run(
+        _run_evaluation(
+            api_cfg,
+            config,
+            seed=args.seed,
+            username=username,
+            persona_id=persona_id,
+            concurrency=max(1, args.concurrency),
+            parallel_modes=args.parallel_modes,
+            trace_file=Path(args.trace_file) if args.trace_file else None
+        )
     )
     
     save_json(results, out_file)
@@ -285,6 +537,8 @@ def main():
     print("="*60)
     
     print(f"\n✓ 结果已保存到 {out_file}")
+    if args.trace_file:
+        print(f"✓ 逐条明细已写入 {args.trace_file}")
 
 
 if __name__ == "__main__":
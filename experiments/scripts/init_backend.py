@@ -10,9 +10,14 @@ import logging
 import sys
 import time
 from pathlib import Path
-from typing import Any, Dict, Optional
-from urllib.error import HTTPError, URLError
-from urllib.request import Request, urlopen
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from utils.api_client import load_api_config
+from utils.data_loader import dumps_json, loads_json
+from utils.http_client import JSON_HEADERS
+from utils.paths import EXP_DIR
 
 # Configure logging
 logging.basicConfig(
@@ -21,6 +26,11 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+API_CONFIG_PATH = EXP_DIR / "config" / "api_config.json"
+
+# Connection attempts retried by the HTTP transport before a request fails
+CONNECT_RETRIES = 3
+
 
 class BackendInitializer:
     """Initialize backend with test data."""
@@ -32,6 +42,17 @@ class BackendInitializer:
         self.user_password = "testpass123"
         self.display_name = "Eval User"
         self.persona_id: Optional[int] = None
+        # One keep-alive connection pool for every request of the run; the
+        # transport retries connection failures so a backend that is still
+        # starting up does not abort initialization.
+        self._client = httpx.Client(
+            timeout=10,
+            transport=httpx.HTTPTransport(retries=CONNECT_RETRIES),
+        )
+    
+    def close(self) -> None:
+        """Close the pooled HTTP client."""
+        self._client.close()
     
     def _make_request(
         self,
@@ -43,33 +64,25 @@ class BackendInitializer:
         url = f"{self.backend_url}{endpoint}"
         
         try:
-            if data:
-                body = json.dumps(data).encode('utf-8')
+            if data is None:
+                response = self._client.request(method, url)
             else:
-                body = None
-            
-            req = Request(
-                url,
-                data=body,
-                method=method,
-                headers={'Content-Type': 'application/json'}
-            )
-            
-            with urlopen(req, timeout=10) as response:
-                response_data = json.loads(response.read().decode('utf-8'))
-                return response_data
-        except HTTPError as e:
+                response = self._client.request(method, url, content=dumps_json(data), headers=JSON_HEADERS)
+        except httpx.TransportError as e:
+            logger.error("Request to %s failed: %s", url, e)
+            raise
+        
+        if response.is_error:
             try:
-                error_body = e.read().decode('utf-8')
-                error_data = json.loads(error_body)
-                raise Exception(f"HTTP {e.code}: {error_data}") from e
+                error_data = loads_json(response.content)
             except json.JSONDecodeError:
-                raise Exception(f"HTTP {e.code}: {error_body}") from e
-        except URLError as e:
-            logger.error(f"Request to {url} failed: {e}")
-            raise
+                raise Exception(f"HTTP {response.status_code}: {response.text}")
+            raise Exception(f"HTTP {response.status_code}: {error_data}")
+        
+        try:
+            return loads_json(response.content)
         except json.JSONDecodeError as e:
-            logger.error(f"Failed to parse response from {url}: {e}")
+            logger.error("Failed to parse response from %s: %s", url, e)
             raise
     
     def check_backend(self) -> bool:
@@ -117,18 +130,16 @@ class BackendInitializer:
         success = True
         
         # Load API keys from config if available
-        config_path = Path(__file__).parent.parent / "config" / "api_config.json"
         embedding_api_key = ""  # Set via environment variable or API config
         llm_api_key = ""  # Set via environment variable or API config
         
-        if config_path.exists():
+        if API_CONFIG_PATH.exists():
             try:
-                with open(config_path) as f:
-                    config = json.load(f)
-                    if "embedding" in config and "api_key" in config["embedding"]:
-                        embedding_api_key = config["embedding"]["api_key"]
-                    if "llm" in config and "api_key" in config["llm"]:
-                        llm_api_key = config["llm"]["api_key"]
+                config = load_api_config(API_CONFIG_PATH)
+                if "embedding" in config and "api_key" in config["embedding"]:
+                    embedding_api_key = config["embedding"]["api_key"]
+                if "llm" in config and "api_key" in config["llm"]:
+                    llm_api_key = config["llm"]["api_key"]
             except Exception as e:
                 logger.warning(f"Failed to load API keys from config: {e}")
         
@@ -232,11 +243,35 @@ class BackendInitializer:
             "neural networks with representation learning. Learning can be supervised, semi-supervised or unsupervised."
         ]
         
+        # One request embeds all documents together; older backends without
+        # the batch endpoint answer 404 and are fed one document at a time
+        try:
+            logger.info(f"Ingesting {len(documents)} documents in one batch...")
+            response = self._make_request(
+                "POST",
+                f"/api/personas/{self.persona_id}/ingest_text_batch?username={self.username}",
+                {"items": [{"text": doc} for doc in documents]}
+            )
+        except Exception as e:
+            if not str(e).startswith("HTTP 404"):
+                logger.error(f"Failed to ingest documents: {e}")
+                return False
+            logger.warning("Batch ingest endpoint not available, ingesting documents one by one")
+            return self._ingest_documents_one_by_one(documents)
+        
+        if response.get("status") == "success":
+            logger.info(f"Documents ingested: {response.get('documents_added', len(documents))} chunks added")
+            return True
+        logger.warning(f"Document ingestion may have failed: {response}")
+        return False
+    
+    def _ingest_documents_one_by_one(self, documents: List[str]) -> bool:
+        """Ingest documents with one request each."""
         all_success = True
         
         for i, doc in enumerate(documents, 1):
             try:
-                logger.info(f"Ingesting document {i}/{len(documents)}...")
+                logger.info("Ingesting document %d/%d...", i, len(documents))
                 response = self._make_request(
                     "POST",
                     f"/api/personas/{self.persona_id}/ingest_text?username={self.username}",
@@ -244,12 +279,12 @@ class BackendInitializer:
                 )
                 
                 if response.get("status") == "success":
-                    logger.info(f"Document {i} ingested: {response.get('documents_added', 1)} chunks added")
+                    logger.info("Document %d ingested: %s chunks added", i, response.get("documents_added", 1))
                 else:
-                    logger.warning(f"Document {i} ingestion may have failed: {response}")
+                    logger.warning("Document %d ingestion may have failed: %s", i, response)
                     all_success = False
             except Exception as e:
-                logger.error(f"Failed to ingest document {i}: {e}")
+                logger.error("Failed to ingest document %d: %s", i, e)
                 all_success = False
         
         return all_success
@@ -325,7 +360,10 @@ def main():
     args = parser.parse_args()
     
     initializer = BackendInitializer(backend_url=args.backend_url)
-    success = initializer.initialize()
+    try:
+        success = initializer.initialize()
+    finally:
+        initializer.close()
     
     sys.exit(0 if success else 1)
 
@@ -1,11 +1,34 @@
 #!/usr/bin/env python3
 """Summarize experiment results."""
 
-import json
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import Any, Dict, Optional
+
+from utils.data_loader import load_json
+from utils.paths import EXP_DIR
+
+RESULT_FILES = {
+    "exp1": "exp1_results.json",
+    "exp2": "exp2_results.json",
+    "exp3": "exp3_results.json",
+}
+
+
+def _load_optional(path: Path) -> Optional[Any]:
+    return load_json(path) if path.exists() else None
+
+
+def load_results(results_dir: Path) -> Dict[str, Optional[Any]]:
+    """Parse every result file in parallel; missing files map to None."""
+    paths = {name: results_dir / filename for name, filename in RESULT_FILES.items()}
+    with ThreadPoolExecutor(max_workers=len(paths)) as executor:
+        return dict(zip(paths, executor.map(_load_optional, paths.values())))
+
 
 def main():
-    results_dir = Path(__file__).parent.parent / "results"
+    results_dir = EXP_DIR / "results"
+    results = load_results(results_dir)
     
     print("=" * 70)
     print("实验结果汇总".center(70))
@@ -15,9 +38,8 @@ def main():
     # Exp1: RAG Evaluation
     print("📊 实验 1: RAG 检索质量评估")
     print("-" * 70)
-    exp1_path = results_dir / "exp1_results.json"
-    if exp1_path.exists():
-        exp1 = json.loads(exp1_path.read_text())
+    exp1 = results["exp1"]
+    if exp1 is not None:
         print(f"  评估指标:")
         for top_k_key in ["top_k=1", "top_k=3", "top_k=5"]:
             if top_k_key in exp1:
@@ -32,9 +54,8 @@ def main():
     # Exp2: Scheduler Evaluation
     print("⚙️  实验 2: 多 Agent 调度器评估")
     print("-" * 70)
-    exp2_path = results_dir / "exp2_results.json"
-    if exp2_path.exists():
-        exp2 = json.loads(exp2_path.read_text())
+    exp2 = results["exp2"]
+    if exp2 is not None:
         print(f"  Gini 系数 (公平性): {exp2.get('gini', 'N/A'):.4f}")
         print(f"  垄断率: {exp2.get('monopoly_rate', 'N/A'):.2%}")
         print(f"  冷启动率: {exp2.get('cold_rate', 'N/A'):.2%}")
@@ -47,9 +68,8 @@ def main():
     # Exp3: Tool-First Comparison
     print("🔧 实验 3: Tool-First vs Baseline 对比")
     print("-" * 70)
-    exp3_path = results_dir / "exp3_results.json"
-    if exp3_path.exists():
-        exp3 = json.loads(exp3_path.read_text())
+    exp3 = results["exp3"]
+    if exp3 is not None:
         print(f"  测试用例数: {exp3['cases']}")
         print(f"  Token 节省率: {exp3['token_saving_rate']:.1%}")
         print(f"  Baseline 平均 Token: {exp3['baseline_token_avg']:.0f}")
@@ -66,9 +86,8 @@ def main():
     print("=" * 70)
     print()
     print("结果文件位置:")
-    print(f"  - {exp1_path}")
-    print(f"  - {exp2_path}")
-    print(f"  - {exp3_path}")
+    for filename in RESULT_FILES.values():
+        print(f"  - {results_dir / filename}")
     print()
 
 if __name__ == "__main__":
@@ -1,10 +1,13 @@
-import json
+import functools
 import logging
-import urllib.request
 from pathlib import Path
-from typing import Any, Dict
+from types import MappingProxyType
+from typing import Any, Dict, List, Mapping, Optional, Set
 
-from .http_client import build_url, get_json, post_json
+import httpx
+
+from .data_loader import dumps_json, loads_json
+from .http_client import JSON_HEADERS, build_url, get_json, get_json_async, post_json_async
 
 logger = logging.getLogger(__name__)
 
@@ -14,19 +17,27 @@ except Exception:  # pragma: no cover - optional
     yaml = None
 
 
-def load_api_config(path: Path) -> Dict[str, Any]:
-    """Load API configuration from JSON or YAML file."""
+def load_api_config(path: Path) -> Mapping[str, Any]:
+    """Load API configuration from JSON or YAML file.
+
+    Parsed configs are cached per resolved path and returned as a read-only
+    mapping, so callers share one copy and cannot mutate it by accident.
+    """
+    return _load_api_config_cached(path.resolve())
+
+
+@functools.lru_cache(maxsize=4)
+def _load_api_config_cached(path: Path) -> Mapping[str, Any]:
     if not path.exists():
         raise FileNotFoundError(f"API 配置文件不存在: {path}")
-    text = path.read_text(encoding="utf-8")
     if path.suffix.lower() in {".yaml", ".yml"}:
         if yaml is None:
             raise RuntimeError("缺少 PyYAML，无法解析 yaml 配置")
-        return yaml.safe_load(text)
-    return json.loads(text)
+        return MappingProxyType(yaml.safe_load(path.read_text(encoding="utf-8")))
+    return MappingProxyType(loads_json(path.read_bytes()))
 
 
-def assert_backend_ready(cfg: Dict[str, Any]) -> None:
+def assert_backend_ready(cfg: Mapping[str, Any]) -> None:
     """Check if backend is ready by health check endpoint."""
     base_url = cfg.get("base_url", "http://localhost:8000")
     headers = cfg.get("headers") or {}
@@ -41,12 +52,51 @@ def assert_backend_ready(cfg: Dict[str, Any]) -> None:
 
 
 class BackendAPIClient:
-    """Client for interacting with Mul-in-One backend API."""
+    """Client for interacting with Mul-in-One backend API.
+
+    Requests go through one long-lived pooled ``httpx.Client`` so repeated
+    calls reuse keep-alive connections; use it as a context manager (or call
+    ``close()``) to release them.
+    """
     
-    def __init__(self, cfg: Dict[str, Any]):
+    def __init__(
+        self,
+        cfg: Mapping[str, Any],
+        max_connections: int = 100,
+        max_keepalive_connections: int = 50,
+    ):
         self.base_url = cfg.get("base_url", "http://localhost:8000")
         self.headers = cfg.get("headers") or {}
         self.timeout = cfg.get("timeouts", {}).get("healthcheck_seconds", 10)
+        self._client = httpx.Client(
+            headers=self.headers,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+            ),
+            timeout=httpx.Timeout(30.0, connect=self.timeout),
+        )
+    
+    def __enter__(self) -> "BackendAPIClient":
+        return self
+    
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+    
+    def close(self) -> None:
+        self._client.close()
+    
+    def _request_json(self, method: str, url: str, payload: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        try:
+            if payload is None:
+                resp = self._client.request(method, url)
+            else:
+                resp = self._client.request(method, url, content=dumps_json(payload), headers=JSON_HEADERS)
+            resp.raise_for_status()
+            return loads_json(resp.content) if resp.content else {}
+        except Exception as e:
+            logger.error(f"{method} request failed: {url}, error: {e}")
+            raise
     
     def retrieve_documents(
         self, 
@@ -65,7 +115,7 @@ class BackendAPIClient:
             {"username": username, "top_k": top_k}
         )
         payload = {"query": query}
-        return post_json(url, payload, headers=self.headers, timeout=self.timeout)
+        return self._request_json("POST", url, payload)
     
     def ingest_text(
         self,
@@ -84,7 +134,25 @@ class BackendAPIClient:
             {"username": username}
         )
         payload = {"text": text, "source": source}
-        return post_json(url, payload, headers=self.headers, timeout=self.timeout)
+        return self._request_json("POST", url, payload)
+    
+    def ingest_text_batch(
+        self,
+        persona_id: int,
+        username: str,
+        items: List[Dict[str, str]]
+    ) -> Dict[str, Any]:
+        """Call backend RAG batch ingest API with ``[{"text", "source"}, ...]``.
+        
+        POST /api/personas/{persona_id}/ingest_text_batch
+        """
+        url = build_url(
+            self.base_url,
+            f"/api/personas/{persona_id}/ingest_text_batch",
+            {"username": username}
+        )
+        payload = {"items": items}
+        return self._request_json("POST", url, payload)
     
     def create_session(
         self,
@@ -97,7 +165,7 @@ class BackendAPIClient:
         """
         url = build_url(self.base_url, "/api/sessions", {"username": username})
         payload = {"initial_persona_ids": initial_persona_ids or []}
-        return post_json(url, payload, headers=self.headers, timeout=self.timeout)
+        return self._request_json("POST", url, payload)
     
     def enqueue_message(
         self,
@@ -114,7 +182,7 @@ class BackendAPIClient:
             "content": content,
             "target_personas": target_personas or []
         }
-        return post_json(url, payload, headers=self.headers, timeout=self.timeout)
+        return self._request_json("POST", url, payload)
     
     def list_messages(
         self,
@@ -130,7 +198,7 @@ class BackendAPIClient:
             f"/api/sessions/{session_id}/messages",
             {"limit": limit}
         )
-        return get_json(url, headers=self.headers, timeout=self.timeout)
+        return self._request_json("GET", url)
     
     def create_persona(
         self,
@@ -150,7 +218,7 @@ class BackendAPIClient:
             "prompt": prompt,
             "handle": handle or name.lower().replace(" ", "_")
         }
-        return post_json(url, payload, headers=self.headers, timeout=self.timeout)
+        return self._request_json("POST", url, payload)
     
     def get_personas(self, username: str) -> Dict[str, Any]:
         """List personas for a user.
@@ -158,4 +226,147 @@ class BackendAPIClient:
         GET /api/personas
         """
         url = build_url(self.base_url, "/api/personas", {"username": username})
-        return get_json(url, headers=self.headers, timeout=self.timeout)
+        return self._request_json("GET", url)
+
+
+class AsyncBackendAPIClient:
+    """Async client for high-volume experiment traffic against the backend.
+
+    Shares one pooled ``httpx.AsyncClient`` so concurrent requests reuse
+    keep-alive connections instead of paying a fresh handshake per call.
+    """
+
+    def __init__(
+        self,
+        cfg: Mapping[str, Any],
+        max_connections: int = 1000,
+        max_keepalive_connections: int = 100,
+        timeout: float = 30.0,
+    ):
+        self.base_url = cfg.get("base_url", "http://localhost:8000")
+        self.headers = cfg.get("headers") or {}
+        self._client = httpx.AsyncClient(
+            headers=self.headers,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+            ),
+            timeout=timeout,
+        )
+
+    async def __aenter__(self) -> "AsyncBackendAPIClient":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+    async def _get_json(self, url: str) -> Dict[str, Any]:
+        return await get_json_async(self._client, url)
+
+    async def _post_json(self, url: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        return await post_json_async(self._client, url, payload)
+
+    async def retrieve_documents(
+        self,
+        persona_id: int,
+        query: str,
+        username: str,
+        top_k: int = 4
+    ) -> Dict[str, Any]:
+        """Call backend RAG retrieval API.
+
+        POST /api/personas/{persona_id}/rag/retrieve
+        """
+        url = build_url(
+            self.base_url,
+            f"/api/personas/{persona_id}/rag/retrieve",
+            {"username": username, "top_k": top_k}
+        )
+        return await self._post_json(url, {"query": query})
+
+    async def retrieve_documents_batch(
+        self,
+        persona_id: int,
+        queries: List[str],
+        username: str,
+        top_k: int = 4
+    ) -> List[Dict[str, Any]]:
+        """Call backend batch RAG retrieval API; one result per query, in order.
+
+        POST /api/personas/{persona_id}/rag/retrieve_batch
+        """
+        url = build_url(
+            self.base_url,
+            f"/api/personas/{persona_id}/rag/retrieve_batch",
+            {"username": username, "top_k": top_k}
+        )
+        resp = await self._post_json(url, {"queries": queries})
+        return resp.get("results", [])
+
+    async def list_ingested_sources(self, persona_id: int, username: str) -> Set[str]:
+        """List sources already present in the persona's knowledge base.
+
+        GET /api/personas/{persona_id}/sources
+        """
+        url = build_url(
+            self.base_url,
+            f"/api/personas/{persona_id}/sources",
+            {"username": username}
+        )
+        resp = await self._get_json(url)
+        return set(resp.get("sources", []))
+
+    async def ingest_text_batch(
+        self,
+        persona_id: int,
+        username: str,
+        items: List[Dict[str, str]],
+        commit_every: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Call backend RAG batch ingest API with ``[{"text", "source"}, ...]``.
+
+        ``commit_every`` asks the backend to embed and flush that many chunks at a time.
+
+        POST /api/personas/{persona_id}/ingest_text_batch
+        """
+        url = build_url(
+            self.base_url,
+            f"/api/personas/{persona_id}/ingest_text_batch",
+            {"username": username}
+        )
+        payload: Dict[str, Any] = {"items": items}
+        if commit_every is not None:
+            payload["commit_every"] = commit_every
+        return await self._post_json(url, payload)
+
+    async def create_session(
+        self,
+        username: str,
+        initial_persona_ids: Optional[list] = None
+    ) -> Dict[str, Any]:
+        """Create a conversation session.
+
+        POST /api/sessions
+        """
+        url = build_url(self.base_url, "/api/sessions", {"username": username})
+        return await self._post_json(url, {"initial_persona_ids": initial_persona_ids or []})
+
+    async def enqueue_message(
+        self,
+        session_id: str,
+        content: str,
+        target_personas: Optional[list] = None
+    ) -> Dict[str, Any]:
+        """Send message to session.
+
+        POST /api/sessions/{session_id}/messages
+        """
+        url = build_url(self.base_url, f"/api/sessions/{session_id}/messages")
+        payload = {
+            "content": content,
+            "target_personas": target_personas or []
+        }
+        return await self._post_json(url, payload)
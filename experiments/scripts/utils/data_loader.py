@@ -1,16 +1,47 @@
 import json
 from pathlib import Path
-from typing import Any, Dict, List, Tuple
+from typing import Any, Dict, Iterator, List, Mapping
+
+import numpy as np
+
+try:
+    import ijson  # type: ignore
+except Exception:  # pragma: no cover - optional
+    ijson = None
+
+try:
+    import orjson  # type: ignore
+except Exception:  # pragma: no cover - optional
+    orjson = None
+
+
+def loads_json(data: bytes) -> Any:
+    """Parse JSON bytes with orjson when it is installed, else the stdlib."""
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
+def dumps_json(data: Any) -> bytes:
+    """Serialize to compact UTF-8 JSON bytes with orjson when it is installed, else the stdlib."""
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def iter_jsonl(path: Path) -> Iterator[Dict[str, Any]]:
+    """Yield JSONL records one at a time; lines are parsed as bytes."""
+    with path.open("rb") as f:
+        for line in f:
+            # isspace() tests blank lines without allocating a stripped copy
+            if not line.isspace():
+                yield loads_json(line)
 
 
 def load_jsonl(path: Path) -> List[Dict[str, Any]]:
-    with path.open("r", encoding="utf-8") as f:
-        return [json.loads(line) for line in f if line.strip()]
+    return list(iter_jsonl(path))
 
 
 def load_json(path: Path) -> Any:
-    with path.open("r", encoding="utf-8") as f:
-        return json.load(f)
+    return loads_json(path.read_bytes())
 
 
 def load_qa_dataset(path: Path) -> List[Dict[str, Any]]:
@@ -20,6 +51,25 @@ def load_qa_dataset(path: Path) -> List[Dict[str, Any]]:
     return data
 
 
+def iter_qa_dataset(path: Path) -> Iterator[Dict[str, Any]]:
+    """Yield QA pairs one at a time, streaming with ijson when it is installed."""
+    if ijson is None:
+        yield from load_qa_dataset(path)
+        return
+    with path.open("rb") as f:
+        yield from ijson.items(f, "item", use_float=True)
+
+
+def qa_query(qa_pair: Dict[str, Any]) -> str:
+    """Query text of a QA pair (datasets use ``query``; older ones ``question``)."""
+    return qa_pair.get("query") or qa_pair.get("question") or ""
+
+
+def qa_answer(qa_pair: Dict[str, Any]) -> str:
+    """Reference answer of a QA pair (``ground_truth``, falling back to ``answer``)."""
+    return qa_pair.get("ground_truth") or qa_pair.get("answer") or ""
+
+
 def load_conversations(path: Path) -> List[List[Dict[str, Any]]]:
     data = load_json(path)
     if not isinstance(data, list):
@@ -27,16 +77,30 @@ def load_conversations(path: Path) -> List[List[Dict[str, Any]]]:
     return data
 
 
-def build_retrieval_index(docs: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
-    return {doc["id"]: doc for doc in docs}
+class RetrievalIndex(Dict[str, Dict[str, Any]]):
+    """Doc id -> doc mapping that also caches what mock_retrieve scores against."""
+
+    def __init__(self, docs_by_id: Mapping[str, Dict[str, Any]]) -> None:
+        super().__init__(docs_by_id)
+        self.doc_ids = np.array(sorted(self), dtype=object)
+        self.salts = np.fromiter((hash(doc_id) for doc_id in self.doc_ids), dtype=np.int64, count=len(self))
+
+
+def build_retrieval_index(docs: List[Dict[str, Any]]) -> RetrievalIndex:
+    return RetrievalIndex({doc["id"]: doc for doc in docs})
 
 
-def mock_retrieve(query: str, index: Dict[str, Dict[str, Any]], top_k: int) -> List[str]:
+def mock_retrieve(query: str, index: Mapping[str, Dict[str, Any]], top_k: int) -> List[str]:
     """Deterministic pseudo retrieval: rank by simple hash to avoid external calls."""
-    doc_ids = list(index.keys())
-    scored: List[Tuple[int, str]] = []
-    for doc_id in doc_ids:
-        score = hash(query + doc_id) % 1000
-        scored.append((score, doc_id))
-    scored.sort(reverse=True)
-    return [doc_id for _, doc_id in scored[:top_k]]
+    if not isinstance(index, RetrievalIndex):
+        index = RetrievalIndex(index)
+    n = len(index)
+    k = min(top_k, n)
+    if k <= 0:
+        return []
+    scores = (hash(query) ^ index.salts) & 0x3FF
+    # Unique sort keys: score first, then doc id (ids are sorted), highest first
+    keys = scores * n + np.arange(n)
+    top = np.argpartition(keys, n - k)[n - k:]
+    top = top[np.argsort(keys[top])[::-1]]
+    return index.doc_ids[top].tolist()
@@ -1,11 +1,47 @@
-import json
+import atexit
+import threading
 import urllib.parse
-import urllib.request
 from typing import Any, Dict, Optional
 import logging
 
+import httpx
+
+from .data_loader import dumps_json, loads_json
+
 logger = logging.getLogger(__name__)
 
+# Headers for request bodies pre-encoded with dumps_json
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+# Idle keep-alive connections kept by the shared client
+MAX_KEEPALIVE_CONNECTIONS = 32
+
+_client: Optional[httpx.Client] = None
+_client_lock = threading.Lock()
+
+
+def _shared_client() -> httpx.Client:
+    """Process-wide pooled client, created on first use and closed at exit."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = httpx.Client(limits=httpx.Limits(max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS))
+                atexit.register(_client.close)
+    return _client
+
+
+def _merge_json_headers(headers: Optional[Dict[str, str]]) -> Dict[str, str]:
+    req_headers = dict(JSON_HEADERS)
+    if headers:
+        req_headers.update(headers)
+    return req_headers
+
+
+def _parse(resp: httpx.Response) -> Dict[str, Any]:
+    resp.raise_for_status()
+    return loads_json(resp.content) if resp.content else {}
+
 
 def build_url(base_url: str, path: str, query: Optional[Dict[str, Any]] = None) -> str:
     url = base_url.rstrip("/") + "/" + path.lstrip("/")
@@ -17,16 +53,11 @@ def build_url(base_url: str, path: str, query: Optional[Dict[str, Any]] = None)
 
 def post_json(url: str, payload: Dict[str, Any], headers: Optional[Dict[str, str]] = None, timeout: int = 10) -> Dict[str, Any]:
     """POST JSON request and return parsed response."""
-    data = json.dumps(payload).encode("utf-8")
-    req_headers = {"Content-Type": "application/json"}
-    if headers:
-        req_headers.update(headers)
-    req = urllib.request.Request(url, data=data, headers=req_headers, method="POST")
-    
     try:
-        with urllib.request.urlopen(req, timeout=timeout) as resp:  # noqa: S310
-            body = resp.read().decode("utf-8")
-            return json.loads(body) if body else {}
+        resp = _shared_client().post(
+            url, content=dumps_json(payload), headers=_merge_json_headers(headers), timeout=timeout
+        )
+        return _parse(resp)
     except Exception as e:
         logger.error(f"POST request failed: {url}, error: {e}")
         raise
@@ -34,15 +65,38 @@ def post_json(url: str, payload: Dict[str, Any], headers: Optional[Dict[str, str
 
 def get_json(url: str, headers: Optional[Dict[str, str]] = None, timeout: int = 10) -> Dict[str, Any]:
     """GET JSON request and return parsed response."""
-    req_headers = {}
-    if headers:
-        req_headers.update(headers)
-    req = urllib.request.Request(url, headers=req_headers, method="GET")
-    
     try:
-        with urllib.request.urlopen(req, timeout=timeout) as resp:  # noqa: S310
-            body = resp.read().decode("utf-8")
-            return json.loads(body) if body else {}
+        resp = _shared_client().get(url, headers=headers, timeout=timeout)
+        return _parse(resp)
+    except Exception as e:
+        logger.error(f"GET request failed: {url}, error: {e}")
+        raise
+
+
+async def post_json_async(
+    client: httpx.AsyncClient,
+    url: str,
+    payload: Dict[str, Any],
+    headers: Optional[Dict[str, str]] = None,
+) -> Dict[str, Any]:
+    """Async POST JSON request on the caller's pooled client; return parsed response."""
+    try:
+        resp = await client.post(url, content=dumps_json(payload), headers=_merge_json_headers(headers))
+        return _parse(resp)
+    except Exception as e:
+        logger.error(f"POST request failed: {url}, error: {e}")
+        raise
+
+
+async def get_json_async(
+    client: httpx.AsyncClient,
+    url: str,
+    headers: Optional[Dict[str, str]] = None,
+) -> Dict[str, Any]:
+    """Async GET JSON request on the caller's pooled client; return parsed response."""
+    try:
+        resp = await client.get(url, headers=headers)
+        return _parse(resp)
     except Exception as e:
         logger.error(f"GET request failed: {url}, error: {e}")
         raise
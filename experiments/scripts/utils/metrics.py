@@ -1,11 +1,26 @@
-import math
-from typing import List, Sequence
+from typing import AbstractSet, Dict, Iterable, List, Sequence
+
+import numpy as np
+
+# Rank discounts for k up to this size are computed once at import
+MAX_K = 1000
+_LOG2_DISCOUNTS = 1.0 / np.log2(np.arange(2, MAX_K + 2))
+# Lists up to this length are scored in pure Python (cheaper than NumPy there)
+_SMALL_K = 10
+_SMALL_K_DISCOUNTS = _LOG2_DISCOUNTS[:_SMALL_K].tolist()
+# Ideal DCG of a binary ranking with h hits: the first h discounts
+_SMALL_K_IDEAL_DCG = [0.0] + np.cumsum(_LOG2_DISCOUNTS[:_SMALL_K]).tolist()
+
+
+def _as_set(relevant: Iterable[str]) -> AbstractSet[str]:
+    """Reuse an existing set instead of copying it on every call."""
+    return relevant if isinstance(relevant, (set, frozenset)) else set(relevant)
 
 
 def recall_at_k(relevant: Sequence[str], retrieved: Sequence[str], k: int) -> float:
     if k <= 0:
         return 0.0
-    rel_set = set(relevant)
+    rel_set = _as_set(relevant)
     top_k = retrieved[:k]
     if not rel_set:
         return 0.0
@@ -13,36 +28,81 @@ def recall_at_k(relevant: Sequence[str], retrieved: Sequence[str], k: int) -> fl
     return hits / len(rel_set)
 
 
+def recall_at_ks(relevant: Iterable[str], retrieved: Sequence[str], ks: Iterable[int]) -> Dict[int, float]:
+    """recall_at_k for every cutoff in ks from a single walk over retrieved."""
+    ks_sorted = sorted(set(ks))
+    remaining = set(relevant)
+    total = len(remaining)
+    out = {k: 0.0 for k in ks_sorted if k <= 0}
+    pending = [k for k in ks_sorted if k > 0]
+    if not total or not pending:
+        out.update((k, 0.0) for k in pending)
+        return out
+    hits = 0
+    next_i = 0
+    for rank, doc_id in enumerate(retrieved[: pending[-1]], start=1):
+        if doc_id in remaining:
+            remaining.discard(doc_id)
+            hits += 1
+        while next_i < len(pending) and pending[next_i] == rank:
+            out[pending[next_i]] = hits / total
+            next_i += 1
+        if not remaining:
+            # Every relevant doc found: deeper cutoffs cannot change the score
+            break
+    # Cutoffs past the end of retrieved (or past the last hit) keep the final recall
+    out.update((k, hits / total) for k in pending[next_i:])
+    return out
+
+
 def mrr(relevant: Sequence[str], retrieved: Sequence[str]) -> float:
-    rel_set = set(relevant)
+    rel_set = _as_set(relevant)
     for idx, doc_id in enumerate(retrieved, start=1):
         if doc_id in rel_set:
             return 1.0 / idx
     return 0.0
 
 
+def _discounts(n: int) -> np.ndarray:
+    """1 / log2(rank + 1) for ranks 1..n, served from the precomputed table when possible."""
+    if n <= len(_LOG2_DISCOUNTS):
+        return _LOG2_DISCOUNTS[:n]
+    return 1.0 / np.log2(np.arange(2, n + 2))
+
+
 def ndcg_at_k(relevance: Sequence[int], k: int) -> float:
     """relevance: list of binary gains aligned with retrieved items."""
     if k <= 0 or not relevance:
         return 0.0
-    gains = relevance[:k]
-    dcg = sum((2**g - 1) / math.log2(i + 2) for i, g in enumerate(gains))
-    ideal = sorted(gains, reverse=True)
-    idcg = sum((2**g - 1) / math.log2(i + 2) for i, g in enumerate(ideal))
+    relevance = relevance[:k]
+    if len(relevance) <= _SMALL_K:
+        # NumPy's per-call overhead outweighs vectorization on short lists
+        if max(relevance) <= 1:
+            # Binary gains: 2**g - 1 == g, and the ideal ranking puts every hit first
+            hit_discounts = [d for g, d in zip(relevance, _SMALL_K_DISCOUNTS) if g]
+            dcg = sum(hit_discounts)
+            idcg = _SMALL_K_IDEAL_DCG[len(hit_discounts)]
+        else:
+            dcg = sum((2**g - 1) * d for g, d in zip(relevance, _SMALL_K_DISCOUNTS))
+            ideal = sorted(relevance, reverse=True)
+            idcg = sum((2**g - 1) * d for g, d in zip(ideal, _SMALL_K_DISCOUNTS))
+    else:
+        gains = np.exp2(np.asarray(relevance, dtype=np.float64)) - 1.0
+        disc = _discounts(len(gains))
+        dcg = float(np.dot(gains, disc))
+        idcg = float(np.dot(np.sort(gains)[::-1], disc))
     if idcg == 0:
         return 0.0
     return dcg / idcg
 
 
-def gini_coefficient(values: List[float]) -> float:
+def gini_coefficient(values: Sequence[float]) -> float:
     """0 = perfect equality, 1 = perfect inequality."""
-    n = len(values)
-    if n == 0:
-        return 0.0
-    sorted_vals = sorted(values)
-    cumvals = [sum(sorted_vals[: i + 1]) for i in range(n)]
-    total = cumvals[-1]
-    if total == 0:
+    arr = np.sort(np.asarray(values, dtype=np.float64))
+    n = arr.size
+    total = arr.sum()
+    if n == 0 or total == 0:
         return 0.0
-    gini = (n + 1 - 2 * sum(cumvals) / total) / n
-    return gini
+    # Closed form over the sorted values: (2 * sum(i * x_i) - (n + 1) * sum(x_i)) / (n * sum(x_i))
+    ranks = np.arange(1, n + 1, dtype=np.float64)
+    return float((2.0 * np.dot(ranks, arr) - (n + 1) * total) / (n * total))
@@ -0,0 +1,11 @@
+from pathlib import Path
+from typing import Union
+
+# experiments/ directory, resolved once at import
+EXP_DIR = Path(__file__).resolve().parent.parent.parent
+
+
+def resolve_exp_path(path: Union[str, Path]) -> Path:
+    """Resolve ``path`` against the experiments/ directory unless it is absolute."""
+    path = Path(path)
+    return path if path.is_absolute() else EXP_DIR / path
@@ -2,13 +2,29 @@ from pathlib import Path
 import json
 from typing import Any, Dict
 
+try:
+    import orjson  # type: ignore
+except Exception:  # pragma: no cover - optional
+    orjson = None
+
 
 def save_json(data: Dict[str, Any], path: Path) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
+    if orjson is not None:
+        # orjson writes UTF-8 bytes directly; same layout as json.dump(ensure_ascii=False, indent=2)
+        path.write_bytes(orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+        return
     with path.open("w", encoding="utf-8") as f:
         json.dump(data, f, ensure_ascii=False, indent=2)
 
 
+def jsonl_line(record: Dict[str, Any]) -> bytes:
+    """Encode one JSON Lines record as UTF-8 bytes, trailing newline included."""
+    if orjson is not None:
+        return orjson.dumps(record, option=orjson.OPT_APPEND_NEWLINE | orjson.OPT_NON_STR_KEYS)
+    return (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+
+
 def print_table(title: str, rows: Dict[str, Any]) -> None:
     print(f"\n{title}")
     for name, metrics in rows.items():
@@ -2,7 +2,8 @@
 
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from functools import lru_cache
 from pathlib import Path
 from typing import Dict, Iterable
 
@@ -11,6 +12,9 @@ import yaml
 from .api_bindings import normalize_key, parse_bindings
 from .persona import Persona, PersonaAPIConfig
 
+# libyaml-backed loader when PyYAML was built with it; pure-Python fallback otherwise
+_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
 
 @dataclass(slots=True)
 class APIConfigEntry:
@@ -26,6 +30,15 @@ class APIConfiguration:
     configs: Dict[str, APIConfigEntry]
     default_api: str | None = None
     persona_bindings: Dict[str, str] | None = None
+    # persona key -> entry, flattened from persona_bindings so a lookup is a single dict.get
+    persona_entries: Dict[str, APIConfigEntry] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        self.persona_entries = {
+            key: self.configs[api_name]
+            for key, api_name in (self.persona_bindings or {}).items()
+            if api_name in self.configs
+        }
 
     def resolve_default(self) -> APIConfigEntry | None:
         if self.default_api and self.default_api in self.configs:
@@ -33,19 +46,26 @@ class APIConfiguration:
         return next(iter(self.configs.values()), None)
 
     def resolve_for_persona(self, persona_identifier: str | None) -> APIConfigEntry | None:
-        if not persona_identifier or not self.persona_bindings:
+        if not persona_identifier:
             return None
-        key = normalize_key(persona_identifier)
-        api_name = self.persona_bindings.get(key)
-        if not api_name:
-            return None
-        return self.configs.get(api_name)
-
+        return self.persona_entries.get(normalize_key(persona_identifier))
 
 def load_api_configuration(path: Path) -> APIConfiguration:
-    if not path.exists():
-        raise FileNotFoundError(f"API configuration file not found: {path}")
-    raw = yaml.safe_load(path.read_text(encoding="utf-8")) or {}
+    """Parse the YAML at ``path``; repeated calls are served from cache until the file changes.
+
+    The returned configuration is shared between callers and must be treated as read-only.
+    """
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        raise FileNotFoundError(f"API configuration file not found: {path}") from None
+    return _load_api_configuration_cached(str(path.resolve()), stat.st_mtime_ns, stat.st_size)
+
+
+@lru_cache(maxsize=8)
+def _load_api_configuration_cached(path_str: str, mtime_ns: int, size: int) -> APIConfiguration:
+    # mtime_ns/size are part of the cache key only, so an edited file is re-parsed
+    raw = yaml.load(Path(path_str).read_text(encoding="utf-8"), Loader=_YAML_LOADER) or {}
 
     entries = raw.get("apis")
     if not isinstance(entries, list) or not entries:
@@ -12,12 +12,15 @@ from mul_in_one_nemo.db.models import User
 from .db import get_user_db
 from .email import email_service
 
+# Read once at import; both token secrets share the JWT secret
+_JWT_SECRET = Settings.from_env().jwt_secret
+
 
 class UserManager(IntegerIDMixin, BaseUserManager[User, int]):
     """用户管理器，处理注册、验证等逻辑."""
     
-    reset_password_token_secret = Settings.from_env().jwt_secret
-    verification_token_secret = Settings.from_env().jwt_secret
+    reset_password_token_secret = _JWT_SECRET
+    verification_token_secret = _JWT_SECRET
 
     async def on_after_register(self, user: User, request: Optional[Request] = None):
         """用户注册后的回调."""
@@ -4,9 +4,11 @@ from __future__ import annotations
 
 import argparse
 import asyncio
+import re
 import sys
-from dataclasses import replace
-from typing import Iterable, List, Optional
+from dataclasses import dataclass, field, replace
+from functools import lru_cache
+from typing import Callable, Dict, FrozenSet, Iterable, List, Optional, Tuple
 
 from .api_config import apply_api_bindings
 from .config import Settings
@@ -16,9 +18,48 @@ from .runtime import MultiAgentRuntime
 from .scheduler import PersonaState, TurnScheduler
 
 
-# 用于支持用户随时插入消息的全局队列
-user_input_queue: Optional[asyncio.Queue] = None
-new_user_message: Optional[str] = None
+# 空闲时等待用户插话的最长时间（秒）；消息一到立即唤醒，不必等满
+IDLE_INPUT_WAIT = 0.5
+# 流式输出时攒够这么多分块、或距上次刷新超过该时间（秒）、或遇到换行才写终端
+STREAM_FLUSH_CHUNKS = 8
+STREAM_FLUSH_INTERVAL = 0.03
+
+
+class PendingInput:
+    """对话进行中用户插入的最新消息；到达时通过 Event 唤醒等待方，无需轮询"""
+
+    def __init__(self) -> None:
+        self.text: Optional[str] = None
+        self.event = asyncio.Event()
+
+    def put(self, text: str) -> None:
+        self.text = text
+        self.event.set()
+
+    def take(self) -> Optional[str]:
+        text, self.text = self.text, None
+        self.event.clear()
+        return text
+
+    async def wait(self, timeout: float) -> bool:
+        """等待新消息到达，最多 timeout 秒；返回是否有消息"""
+        if self.event.is_set():
+            return True
+        try:
+            await asyncio.wait_for(self.event.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+
+@dataclass
+class ConversationBus:
+    """一次 CLI 会话的用户输入通道，显式传给 run/drive，替代模块级全局变量"""
+
+    # 键盘输入的原始消息，由输入监听任务写入
+    inbox: asyncio.Queue = field(default_factory=asyncio.Queue)
+    # 对话进行中插入的消息，由 drive 在下一轮开头取走
+    pending: PendingInput = field(default_factory=PendingInput)
 
 
 def parse_args() -> argparse.Namespace:
@@ -29,10 +70,34 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument("--max-turns", type=int, default=10, help="Max turns in interactive mode")
     parser.add_argument("--stream", dest="stream", action="store_true", help="Enable streaming output (default)")
     parser.add_argument("--no-stream", dest="stream", action="store_false", help="Disable streaming output")
+    parser.add_argument(
+        "--parallel-speakers",
+        action="store_true",
+        help="Generate all speakers of a round concurrently (they share the same history snapshot)",
+    )
+    parser.add_argument(
+        "--loop",
+        choices=("auto", "asyncio", "uvloop"),
+        default="auto",
+        help="Event loop implementation; auto uses uvloop when installed (as uvicorn does)",
+    )
     parser.set_defaults(stream=True)
     return parser.parse_args()
 
 
+def _loop_factory(name: str) -> Optional[Callable[[], asyncio.AbstractEventLoop]]:
+    """Resolve --loop to an event-loop factory; None means the stock asyncio loop."""
+    if name == "asyncio":
+        return None
+    try:
+        import uvloop
+    except ImportError:
+        if name == "uvloop":
+            raise SystemExit("uvloop is not installed: pip install uvloop")
+        return None
+    return uvloop.new_event_loop
+
+
 async def async_input(prompt: str = "") -> str:
     """异步获取用户输入，不阻塞事件循环"""
     loop = asyncio.get_event_loop()
@@ -45,56 +110,148 @@ def build_scheduler(personas: Iterable[Persona], max_agents: int) -> TurnSchedul
     return TurnScheduler(states, max_agents=effective_max)
 
 
+class _TagMatcher:
+    """Finds every persona whose lowercased name or handle occurs in a text, in one regex scan."""
+
+    def __init__(self, tokens: Tuple[Tuple[str, str], ...]) -> None:
+        owners: Dict[str, set[int]] = {}
+        always: set[int] = set()
+        for idx, pair in enumerate(tokens):
+            for token in pair:
+                if token:
+                    owners.setdefault(token, set()).add(idx)
+                else:
+                    always.add(idx)  # "" is a substring of every text
+        self._always = frozenset(always)
+        # The scan reports only the longest token at each position, so credit every
+        # token contained in it as well to keep plain substring semantics
+        self._hits: Dict[str, FrozenSet[int]] = {
+            token: frozenset(i for other, ids in owners.items() if other in token for i in ids)
+            for token in owners
+        }
+        ordered = sorted(owners, key=len, reverse=True)
+        # Zero-width lookahead so matches may overlap
+        self._pattern = (
+            re.compile("(?=(" + "|".join(map(re.escape, ordered)) + "))") if ordered else None
+        )
+
+    def match(self, lowered: str) -> set[int]:
+        found = set(self._always)
+        if self._pattern is not None:
+            hits = self._hits
+            for m in self._pattern.finditer(lowered):
+                found |= hits[m.group(1)]
+        return found
+
+
+@lru_cache(maxsize=32)
+def _tag_matcher(tokens: Tuple[Tuple[str, str], ...]) -> _TagMatcher:
+    return _TagMatcher(tokens)
+
+
 def extract_tags(user_text: str, personas: Iterable[Persona]) -> List[str]:
-    lowered = user_text.lower()
-    tags = []
-    for persona in personas:
-        handle = persona.handle.lower()
-        if persona.name.lower() in lowered or handle in lowered:
-            tags.append(persona.name)
-    return tags
+    personas = list(personas)
+    matcher = _tag_matcher(tuple((p.name.lower(), p.handle.lower()) for p in personas))
+    found = matcher.match(user_text.lower())
+    return [persona.name for idx, persona in enumerate(personas) if idx in found]
 
 
 def format_response(persona_name: str, text: str) -> str:
     return f"{persona_name}> {text.strip()}"
 
 
+def _chunk_text(chunk) -> str:
+    """提取流式分块中的文本内容"""
+    if hasattr(chunk, 'content'):
+        return chunk.content
+    if isinstance(chunk, str):
+        return chunk
+    return str(chunk)
+
+
 async def stream_response(persona_name: str, text_generator) -> str:
     """流式输出响应"""
-    print(f"{persona_name}> ", end="", flush=True)
-    full_text = ""
+    out = sys.stdout
+    out.write(f"{persona_name}> ")
+    out.flush()
+    clock = asyncio.get_running_loop().time
+    parts: List[str] = []
+    # 小分块先缓冲，按批写出，避免每个 token 一次 write+flush
+    pending: List[str] = []
+    last_flush = clock()
     
     try:
         async for chunk in text_generator:
-            # 提取文本内容
-            if hasattr(chunk, 'content'):
-                text = chunk.content
-            elif isinstance(chunk, str):
-                text = chunk
-            else:
-                text = str(chunk)
-            
-            print(text, end="", flush=True)
-            full_text += text
+            text = _chunk_text(chunk)
+            parts.append(text)
+            pending.append(text)
+            now = clock()
+            if "\n" in text or len(pending) >= STREAM_FLUSH_CHUNKS or now - last_flush > STREAM_FLUSH_INTERVAL:
+                out.write("".join(pending))
+                out.flush()
+                pending.clear()
+                last_flush = now
         
+        out.write("".join(pending))
         print()  # 换行
-        return full_text
+        return "".join(parts)
     except Exception as e:
+        out.write("".join(pending))
         print(f"\n[流式输出错误: {e}]")
-        return full_text
+        return "".join(parts)
 
 
-async def check_user_input() -> Optional[str]:
-    """检查用户是否输入了新消息（非阻塞）"""
-    global user_input_queue
-    
-    if user_input_queue is None:
-        return None
-    
-    try:
-        return user_input_queue.get_nowait()
-    except asyncio.QueueEmpty:
-        return None
+async def _speak(runtime: MultiAgentRuntime, persona_name: str, payload: dict, stream: bool) -> str:
+    """调用单个 persona 并输出其回复"""
+    if stream and runtime.supports_stream(persona_name):
+        return await stream_response(persona_name, runtime.invoke_stream(persona_name, payload))
+    result = await runtime.invoke(persona_name, payload)
+    reply = result.response if hasattr(result, 'response') else str(result)
+    print(format_response(persona_name, reply))
+    return reply
+
+
+class _InterleavedPrinter:
+    """并发发言时按到达顺序输出各 persona 的分块；发言者切换时另起一行并打印名字"""
+
+    def __init__(self) -> None:
+        self._current: Optional[str] = None
+
+    def write(self, persona_name: str, text: str) -> None:
+        if persona_name != self._current:
+            prefix = "\n" if self._current is not None else ""
+            print(f"{prefix}{persona_name}> ", end="")
+            self._current = persona_name
+        print(text, end="", flush=True)
+
+    def finish(self) -> None:
+        if self._current is not None:
+            print()
+            self._current = None
+
+
+async def _speak_interleaved(
+    runtime: MultiAgentRuntime,
+    persona_name: str,
+    payload: dict,
+    stream: bool,
+    printer: _InterleavedPrinter,
+) -> str:
+    """与同轮其他 persona 并发调用，输出交给共享的 printer"""
+    if stream and runtime.supports_stream(persona_name):
+        parts: List[str] = []
+        try:
+            async for chunk in runtime.invoke_stream(persona_name, payload):
+                text = _chunk_text(chunk)
+                printer.write(persona_name, text)
+                parts.append(text)
+        except Exception as e:
+            printer.write(persona_name, f"[流式输出错误: {e}]")
+        return "".join(parts)
+    result = await runtime.invoke(persona_name, payload)
+    reply = result.response if hasattr(result, 'response') else str(result)
+    printer.write(persona_name, reply.strip())
+    return reply
 
 
 async def drive(
@@ -104,7 +261,10 @@ async def drive(
     initial_user_text: str, 
     memory_window: int,
     max_exchanges: int = 10,  # 增加最大交互轮数
-    stream: bool = False
+    stream: bool = False,
+    context_token_budget: int = 0,
+    bus: Optional[ConversationBus] = None,
+    parallel_speakers: bool = False,
 ) -> None:
     """
     驱动一次对话流程，支持 Agent 之间的连续对话、用户随时插入消息。
@@ -123,9 +283,21 @@ async def drive(
         memory_window: 记忆窗口
         max_exchanges: Agent 之间最多交互轮数
         stream: 是否启用流式输出
+        context_token_budget: 历史消息的估算 token 上限，0 表示只按 memory_window 截取
+        bus: 用户输入通道；为 None 时（单条消息模式）不接收插入消息
+        parallel_speakers: 同一轮的多个发言者并发生成（共享同一份历史，互相看不到本轮回复）
     """
-    global new_user_message
-    
+    pending_input = bus.pending if bus is not None else PendingInput()
+
+    def history_payload() -> dict:
+        if context_token_budget > 0:
+            history = memory.as_payload_budgeted(context_token_budget, memory_window)
+        else:
+            history = memory.as_payload(memory_window)
+        return {
+            "history": history, 
+            "user_message": ""  # 上下文中已包含所有消息
+        }
     # 记录初始用户消息
     memory.add("用户", initial_user_text)
     pending_user_mentions = extract_tags(initial_user_text, runtime.personas)
@@ -136,9 +308,8 @@ async def drive(
     
     for exchange_round in range(max_exchanges):
         # 在每轮开始前，检查是否有新的用户消息插入
-        if new_user_message and not is_first_round:
-            user_msg = new_user_message
-            new_user_message = None
+        user_msg = None if is_first_round else pending_input.take()
+        if user_msg:
             print(f"你> {user_msg}")
             memory.add("用户", user_msg)
             # 提取新的 @
@@ -164,50 +335,49 @@ async def drive(
         
         # 如果没有人想说话了，对话自然结束
         if not speakers:
-            # 再等待一小段时间，看用户是否有新输入
-            await asyncio.sleep(0.5)
-            if new_user_message:
+            # 再等待一小段时间，看用户是否有新输入（消息到达即唤醒）
+            if await pending_input.wait(IDLE_INPUT_WAIT):
                 continue  # 有新消息，继续循环
             print("[对话暂停，等待新消息...]")
             break
         
-        # 每个选中的 Agent 发言
-        for persona_name in speakers:
-            payload = {
-                "history": memory.as_payload(memory_window), 
-                "user_message": ""  # 上下文中已包含所有消息
-            }
-            
-            if stream:
-                try:
-                    result_stream = runtime.invoke_stream(persona_name, payload)
-                    reply = await stream_response(persona_name, result_stream)
-                except (AttributeError, NotImplementedError):
-                    result = await runtime.invoke(persona_name, payload)
-                    reply = result.response if hasattr(result, 'response') else str(result)
-                    print(format_response(persona_name, reply))
+        # 并发模式：本轮发言者同时生成，耗时取决于最慢的一个而非所有人之和
+        concurrent_replies: Optional[List[str]] = None
+        if parallel_speakers and len(speakers) > 1:
+            payload = history_payload()
+            printer = _InterleavedPrinter()
+            try:
+                concurrent_replies = await asyncio.gather(
+                    *(_speak_interleaved(runtime, name, payload, stream, printer) for name in speakers)
+                )
+            finally:
+                printer.finish()
+        
+        # 每个选中的 Agent 发言（并发模式下按调度顺序写入记忆）
+        for i, persona_name in enumerate(speakers):
+            if concurrent_replies is not None:
+                reply = concurrent_replies[i]
             else:
-                result = await runtime.invoke(persona_name, payload)
-                reply = result.response if hasattr(result, 'response') else str(result)
-                print(format_response(persona_name, reply))
+                reply = await _speak(runtime, persona_name, history_payload(), stream)
             
             memory.add(persona_name, reply)
             last_speaker = persona_name
             
             # 检查回复中是否有新的 @
             new_tags = extract_tags(reply, runtime.personas)
-            for tag in new_tags:
-                if tag not in pending_agent_mentions and tag not in pending_user_mentions:
-                    pending_agent_mentions.append(tag)
+            if new_tags:
+                # 已在等待中的 @ 不重复加入，保持首次出现的顺序
+                queued = set(pending_agent_mentions)
+                queued.update(pending_user_mentions)
+                for tag in new_tags:
+                    if tag not in queued:
+                        queued.add(tag)
+                        pending_agent_mentions.append(tag)
             
-            # Agent 发言完成后，检查是否有用户新消息插入
-            # 如果有，不打断，而是在下一轮处理
-            await asyncio.sleep(0.1)  # 给一点时间让输入队列更新
+            # 发言期间用户插入的消息不打断当前轮，留到下一轮开头处理
 
 
 async def run(args: argparse.Namespace) -> None:
-    global user_input_queue, new_user_message
-    
     settings = Settings.from_env(args.personas, args.api_config)
     persona_settings = load_personas(settings.persona_file)
     if settings.api_configuration:
@@ -221,7 +391,16 @@ async def run(args: argparse.Namespace) -> None:
 
     async with MultiAgentRuntime(updated, persona_settings.personas) as runtime:
         if args.message:
-            await drive(runtime, scheduler, memory, args.message, memory_window, stream=args.stream)
+            await drive(
+                runtime,
+                scheduler,
+                memory,
+                args.message,
+                memory_window,
+                stream=args.stream,
+                context_token_budget=updated.context_token_budget,
+                parallel_speakers=args.parallel_speakers,
+            )
             return
 
         print("=" * 60)
@@ -239,7 +418,7 @@ async def run(args: argparse.Namespace) -> None:
         print("=" * 60)
         print()
         
-        user_input_queue = asyncio.Queue()
+        bus = ConversationBus()
         
         # 启动后台输入监听任务
         async def input_listener():
@@ -250,9 +429,9 @@ async def run(args: argparse.Namespace) -> None:
                     user_input = await loop.run_in_executor(None, input, "")
                     user_input = user_input.strip()
                     if user_input:
-                        await user_input_queue.put(user_input)
+                        await bus.inbox.put(user_input)
                 except (KeyboardInterrupt, EOFError):
-                    await user_input_queue.put("exit")
+                    await bus.inbox.put("exit")
                     break
                 except Exception as e:
                     print(f"\n[输入监听错误: {e}]")
@@ -260,72 +439,39 @@ async def run(args: argparse.Namespace) -> None:
         
         input_task = asyncio.create_task(input_listener())
         
+        def start_conversation(user_msg: str) -> asyncio.Task:
+            print(f"你> {user_msg}")
+            return asyncio.create_task(
+                drive(
+                    runtime,
+                    scheduler,
+                    memory,
+                    user_msg,
+                    memory_window,
+                    max_exchanges=50,
+                    stream=args.stream,
+                    context_token_budget=updated.context_token_budget,
+                    bus=bus,
+                    parallel_speakers=args.parallel_speakers,
+                )
+            )
+        
+        conversation_task: Optional[asyncio.Task] = None
         try:
             print("请输入消息开始对话：")
-            conversation_task = None
             
+            # 输入队列只在这里消费：对话进行中则注入消息，否则开始新一轮对话。
+            # 对话结束不需要唤醒这里，因此无需每轮创建/取消等待任务。
             while True:
-                # 1. 如果对话正在进行，等待输入或对话结束
-                if conversation_task and not conversation_task.done():
-                    input_wait_task = asyncio.create_task(user_input_queue.get())
-                    
-                    done, pending = await asyncio.wait(
-                        {conversation_task, input_wait_task},
-                        return_when=asyncio.FIRST_COMPLETED
-                    )
-                    
-                    if input_wait_task in done:
-                        user_msg = input_wait_task.result()
-                        if user_msg.lower() in {"exit", "quit"}:
-                            conversation_task.cancel()
-                            break
-                        
-                        # 如果对话刚好也结束了，或者还在运行
-                        if conversation_task.done():
-                            # 对话已结束，作为新对话开始
-                            print(f"你> {user_msg}")
-                            conversation_task = asyncio.create_task(
-                                drive(
-                                    runtime,
-                                    scheduler,
-                                    memory,
-                                    user_msg,
-                                    memory_window,
-                                    max_exchanges=50,
-                                    stream=args.stream
-                                )
-                            )
-                        else:
-                            # 对话还在运行，注入消息
-                            new_user_message = user_msg
-                            # 继续循环，conversation_task 保持不变
-                    else:
-                        # 对话结束了，输入还没来
-                        input_wait_task.cancel()
-                        # 继续循环，下一次会进入 else 分支
-                        pass
+                user_msg = await bus.inbox.get()
+                if user_msg.lower() in {"exit", "quit"}:
+                    break
                 
-                # 2. 如果没有对话在进行（或刚结束）
+                if conversation_task is not None and not conversation_task.done():
+                    bus.pending.put(user_msg)
                 else:
-                    # 纯粹等待输入
-                    user_msg = await user_input_queue.get()
-                    
-                    if user_msg.lower() in {"exit", "quit"}:
-                        break
-                    
-                    print(f"你> {user_msg}")
-                    conversation_task = asyncio.create_task(
-                        drive(
-                            runtime,
-                            scheduler,
-                            memory,
-                            user_msg,
-                            memory_window,
-                            max_exchanges=50,
-                            stream=args.stream
-                        )
-                    )
-                
+                    conversation_task = start_conversation(user_msg)
+        
         except KeyboardInterrupt:
             print("\n再见！")
         finally:
@@ -340,7 +486,9 @@ async def run(args: argparse.Namespace) -> None:
 
 def main() -> None:
     args = parse_args()
-    asyncio.run(run(args))
+    # uvloop cuts per-await scheduling cost on the chunk-by-chunk streaming path
+    with asyncio.Runner(loop_factory=_loop_factory(args.loop)) as runner:
+        runner.run(run(args))
 
 
 if __name__ == "__main__":
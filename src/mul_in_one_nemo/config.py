@@ -33,6 +33,8 @@ class Settings:
     # Optional runtime defaults (can be overridden by user data in DB)
     max_agents_per_turn: int = 2
     memory_window: int = 8
+    # Estimated-token cap on the history sent per persona call (0 = only memory_window applies)
+    context_token_budget: int = 0
     temperature: float = 0.4
     # Max conversation exchanges per user message (rounds)
     max_exchanges_per_turn: int = 8
@@ -107,6 +109,9 @@ class Settings:
 
         memory_window_str = os.environ.get("MUL_IN_ONE_MEMORY_WINDOW")
         memory_window = int(memory_window_str) if memory_window_str else 8
+
+        context_tokens_str = os.environ.get("MUL_IN_ONE_CONTEXT_TOKENS")
+        context_token_budget = int(context_tokens_str) if context_tokens_str else 0
         
         max_exchanges_str = os.environ.get("MUL_IN_ONE_MAX_EXCHANGES")
         max_exchanges = int(max_exchanges_str) if max_exchanges_str else 8
@@ -144,6 +149,7 @@ class Settings:
             nim_api_key=nim_api_key,
             max_agents_per_turn=max_agents,
             memory_window=memory_window,
+            context_token_budget=context_token_budget,
             temperature=temperature,
             max_exchanges_per_turn=max_exchanges,
             stop_patience=stop_patience,
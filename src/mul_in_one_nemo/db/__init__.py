@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+import threading
 from contextlib import asynccontextmanager
 
 from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
@@ -10,23 +11,26 @@ from mul_in_one_nemo.config import Settings
 
 _engine: AsyncEngine | None = None
 _session_factory: async_sessionmaker | None = None
+# Guards first-use initialization so concurrent callers never build two engines/pools
+_init_lock = threading.RLock()
 
 
 def get_engine(settings: Settings | None = None) -> AsyncEngine:
     global _engine
-    if _engine is not None:
-        return _engine
-    resolved = settings or Settings.from_env()
-    _engine = create_async_engine(resolved.database_url, future=True, echo=False)
+    if _engine is None:
+        with _init_lock:
+            if _engine is None:
+                resolved = settings or Settings.from_env()
+                _engine = create_async_engine(resolved.database_url, future=True, echo=False)
     return _engine
 
 
 def get_session_factory(settings: Settings | None = None) -> async_sessionmaker:
     global _session_factory
-    if _session_factory is not None:
-        return _session_factory
-    engine = get_engine(settings)
-    _session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    if _session_factory is None:
+        with _init_lock:
+            if _session_factory is None:
+                _session_factory = async_sessionmaker(get_engine(settings), expire_on_commit=False)
     return _session_factory
 
 
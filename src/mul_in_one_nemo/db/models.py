@@ -11,6 +11,7 @@ from sqlalchemy import (
     DateTime,
     Float,
     ForeignKey,
+    Index,
     Integer,
     String,
     Table,
@@ -30,6 +31,7 @@ session_participants_table = Table(
     Base.metadata,
     Column("session_id", String, ForeignKey("sessions.id", ondelete="CASCADE"), primary_key=True),
     Column("persona_id", Integer, ForeignKey("personas.id", ondelete="CASCADE"), primary_key=True),
+    Index("ix_session_participants_persona_id", "persona_id"),
 )
 
 
@@ -2,11 +2,18 @@
 
 from __future__ import annotations
 
-from dataclasses import dataclass, asdict
-from typing import List, Dict, Optional
+from collections import deque
+from dataclasses import dataclass
+from itertools import islice
+from typing import Deque, Dict, List, Optional, TypeVar
 import time
 
 
+T = TypeVar("T")
+
+# Default ring-buffer size: long sessions keep bounded memory, older messages are only counted
+MAX_MESSAGES = 1024
+
 
 @dataclass(slots=True)
 class Message:
@@ -15,31 +22,88 @@ class Message:
     recipient: Optional[str] = None  # 支持@或私聊，群聊时为None
     timestamp: float = 0.0           # 消息时间戳，默认0
 
+    def to_dict(self) -> Dict[str, object]:
+        """Payload form of the message; explicit fields instead of dataclasses.asdict reflection/deepcopy."""
+        return {
+            "speaker": self.speaker,
+            "content": self.content,
+            "recipient": self.recipient,
+            "timestamp": self.timestamp,
+        }
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token), no tokenizer needed."""
+    return (len(text) + 3) // 4
+
+
+def _tail(items: Deque[T], limit: int) -> List[T]:
+    """Same result as ``list(items)[-limit:]``, reading only the last ``limit`` entries."""
+    if limit <= 0:
+        return list(items)[-limit:]
+    tail = list(islice(reversed(items), limit))
+    tail.reverse()
+    return tail
 
 
 class ConversationMemory:
-    def __init__(self) -> None:
-        self._messages: List[Message] = []
+    def __init__(self, max_messages: Optional[int] = MAX_MESSAGES) -> None:
+        """max_messages: 保留的最大消息数（环形缓冲），None 表示不限制。"""
+        # 因超出容量被丢弃的最早消息数
+        self.archived_count = 0
+        self._messages: Deque[Message] = deque(maxlen=max_messages)
+        # Payload dicts are built once per message and shared by every as_payload call
+        self._payloads: Deque[Dict[str, object]] = deque(maxlen=max_messages)
+        self._token_counts: Deque[int] = deque(maxlen=max_messages)
 
     def add(self, speaker: str, content: str, recipient: Optional[str] = None) -> None:
-        ts = time.time()
-        self._messages.append(Message(speaker=speaker, content=content, recipient=recipient, timestamp=ts))
+        if len(self._messages) == self._messages.maxlen:
+            self.archived_count += 1
+        message = Message(speaker=speaker, content=content, recipient=recipient, timestamp=time.time())
+        self._messages.append(message)
+        self._payloads.append(message.to_dict())
+        self._token_counts.append(estimate_tokens(content))
 
     def recent(self, limit: int) -> List[Message]:
-        return self._messages[-limit:]
+        return _tail(self._messages, limit)
 
     def as_payload(self, limit: int, last_n: Optional[int] = None) -> List[Dict[str, str]]:
         """
         返回消息列表，每条包含 speaker, content, recipient, timestamp。
         limit: 默认窗口条数。
         last_n: 若指定则只返回最后 N 条。
+        返回的字典在多次调用间共享，调用方不应修改。
         """
         # When limit <= 0, treat as unlimited (full history)
         if last_n is not None:
             effective_limit = last_n
         else:
-            effective_limit = len(self._messages) if limit <= 0 else limit
-        return [asdict(message) for message in self.recent(effective_limit)]
+            effective_limit = len(self._payloads) if limit <= 0 else limit
+        return _tail(self._payloads, effective_limit)
+
+    def as_payload_budgeted(self, max_tokens: int, limit: int = 0) -> List[Dict[str, object]]:
+        """
+        在 as_payload(limit) 的窗口内，从最新消息往前累计估算 token，超出 max_tokens 即停止。
+        最新一条消息总会保留；被预算挤掉的较早消息折叠为一条 system 归档标记。
+        """
+        window = len(self._payloads) if limit <= 0 else min(limit, len(self._payloads))
+        kept = 0
+        used = 0
+        for count in islice(reversed(self._token_counts), window):
+            if kept and used + count > max_tokens:
+                break
+            used += count
+            kept += 1
+        payload = _tail(self._payloads, kept)
+        archived = window - kept
+        if archived:
+            payload.insert(0, {
+                "speaker": "system",
+                "content": f"[archived {archived} earlier turns]",
+                "recipient": None,
+                "timestamp": payload[0]["timestamp"],
+            })
+        return payload
 
     def get_last_message(self) -> str:
         if not self._messages:
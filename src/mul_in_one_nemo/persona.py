@@ -2,11 +2,16 @@
 
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from functools import lru_cache
 from pathlib import Path
-from typing import List
+from typing import Any, Dict, List
 import yaml
 
+# libyaml-backed loader when PyYAML was built with it; pure-Python fallback otherwise
+_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
 @dataclass(slots=True)
 class Persona:
     name: str
@@ -18,12 +23,16 @@ class Persona:
     api: "PersonaAPIConfig" | None = None
     api_binding: str | None = None
     id: int | None = None # Add this line
+    # Filled by the first system_prompt() call; prompt/tone/catchphrases are fixed after loading
+    _cached_system_prompt: str | None = field(default=None, init=False, repr=False, compare=False)
 
     def system_prompt(self) -> str:
-        tagline = f"语气倾向：{self.tone}" if self.tone else ""
-        catch = "；".join(self.catchphrases or [])
-        tail = f"常用语：{catch}" if catch else ""
-        return f"{self.prompt}\n{tagline}\n{tail}".strip()
+        if self._cached_system_prompt is None:
+            tagline = f"语气倾向：{self.tone}" if self.tone else ""
+            catch = "；".join(self.catchphrases or [])
+            tail = f"常用语：{catch}" if catch else ""
+            self._cached_system_prompt = f"{self.prompt}\n{tagline}\n{tail}".strip()
+        return self._cached_system_prompt
 
 
 @dataclass(slots=True)
@@ -41,8 +50,19 @@ class PersonaSettings:
     memory_window: int
 
 
+@lru_cache(maxsize=8)
+def _load_yaml(path_str: str, mtime_ns: int, size: int) -> Dict[str, Any]:
+    # mtime_ns/size are part of the cache key only, so an edited file is re-parsed
+    return yaml.load(Path(path_str).read_text(encoding="utf-8"), Loader=_YAML_LOADER) or {}
+
+
 def load_personas(path: Path) -> PersonaSettings:
-    data = yaml.safe_load(path.read_text(encoding="utf-8")) or {}
+    """Build persona settings from ``path``; the YAML is only re-parsed when the file changes.
+
+    Persona objects are created fresh on every call, so callers may modify them freely.
+    """
+    stat = path.stat()
+    data = _load_yaml(str(path.resolve()), stat.st_mtime_ns, stat.st_size)
     personas: List[Persona] = []
     for raw in data.get("personas", []):
         api_field = raw.get("api")
@@ -67,7 +87,8 @@ def load_personas(path: Path) -> PersonaSettings:
                 prompt=raw.get("prompt", ""),
                 tone=raw.get("tone", "neutral"),
                 proactivity=float(raw.get("proactivity", 0.5)),
-                catchphrases=raw.get("catchphrases"),
+                # Copied so edits never reach the cached YAML document
+                catchphrases=list(raw["catchphrases"]) if raw.get("catchphrases") else raw.get("catchphrases"),
                 api=api_config,
                 api_binding=binding_clean,
             )
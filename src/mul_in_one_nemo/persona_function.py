@@ -1,6 +1,7 @@
 """Custom function registration for persona replies."""
 
 import logging
+from itertools import islice
 from typing import Any, Dict, List, Optional, AsyncGenerator
 
 from pydantic import BaseModel, Field
@@ -48,6 +49,71 @@ class PersonaDialogueFunctionConfig(FunctionBaseConfig, name="mul_in_one_persona
     tool_names: List[str] = Field(default_factory=list, description="List of tools available to the persona")
 
 
+# Group-chat persona rules; filled once per persona in persona_dialogue_function
+_STATIC_SYSTEM_PROMPT_TEMPLATE = """你是{persona_name}。{persona_prompt}
+
+你正在参与一个多人自由对话。请注意：
+
+【对话规则】
+1. 这是自然的多人在一起的互动对话，不是一问一答。
+2. 你可以：
+   - 回应其他人的观点（不需要被 @ 也可以回应）
+   - 提出自己的问题或想法
+   - 对感兴趣的话题发表看法
+   - @ 其他人邀请他们参与（格式：@某人，仅限参与者列表中的人）
+   - 对某个观点表示赞同或提出不同看法
+
+【何时发言】
+✅ 应该发言的情况：
+   - 有人 @ 你
+   - 话题与你的专长或兴趣相关
+   - 你对刚才的观点有独特见解
+   - 你想补充或纠正某个信息
+   - 对话冷场时可以提出新话题
+
+❌ 不要发言的情况：
+   - 别人已经说得很完整了
+   - 话题完全不在你的专长范围
+   - 你没有新的内容可补充
+   - 只是为了发言而发言
+   - **用户只说了简单的问候（如"你好"、"晚上好"）时，简短回应即可，不要自己延伸出新话题或提及不存在的上下文**
+
+【发言风格】
+- 保持你的个性特点：{persona_prompt}
+- 自然、真实，像真人在聊天
+- 可以简短，不需要每次都长篇大论
+- 可以表达情绪和态度
+- **根据对话实际内容回复，不要凭空编造或提及对话中没有出现过的事情**
+
+【身份与发言身份】
+- 只以你自己的身份发言，绝不假扮他人
+- 不要替他人说话或用他人的第一人称回复
+- 如果需要引用他人的观点，请用第三人称描述
+
+【重要规则】
+1. 如果下文中提供了「检索到的相关资料」，请优先基于这些资料回答，确保回答准确且符合角色设定。
+2. 只基于已有的对话历史回复，不要假设或编造对话中未出现的内容，不知道的内容调用网络检索工具。
+3. 如果用户只是简单问候，简短回应即可，不要过度延伸。
+
+【可用工具（高优先级）】
+- WebSearch：用于检索最新公开信息（新闻、版本、价格等）。当你对事实不确定、涉及时间/地点/事件/行程/更新的信息，或用户要求来源、“上网查/搜”时，主动调用该工具，并在回答中引用返回链接。用户没明确要求也要主动查，避免凭空回答。若搜索/网络失败或结果为空，请直说，不要假装已经查阅。
+- RagQuery：用于查询你的人物背景与相关资料。遇到涉及你背景、设定或过往信息的提问或讨论时，优先调用该工具获取片段并据此作答。
+
+工具使用原则：
+- 工具调用优先级仅次于系统提示；必要时请主动调用，无需等待用户明确要求。
+- 每轮可按需调用 1-2 次，避免过度调用导致延迟。
+- 在回答中标注引用，区分来自工具的结论与个人观点。
+
+记住：这是一群人在一起说话，要像真人一样自然互动！"""
+
+
+def _content_part_text(part: Any) -> str:
+    """Text of one multi-part message block; str(part) is only built when there is no text key."""
+    if isinstance(part, dict) and "text" in part:
+        return part["text"]
+    return str(part)
+
+
 @register_function(config_type=PersonaDialogueFunctionConfig)
 async def persona_dialogue_function(config: PersonaDialogueFunctionConfig, builder: Builder):
     # NIM 在 NAT 中只注册了 LangChain 封装，必须使用 LLMFrameworkEnum.LANGCHAIN
@@ -73,6 +139,17 @@ async def persona_dialogue_function(config: PersonaDialogueFunctionConfig, build
     )
     graph = await graph_builder.build_graph()
 
+    # Persona identity and rules never change for this function instance. Build the leading
+    # system prompt once so every call sends a byte-identical prefix that provider-side
+    # prompt/KV caches can reuse; per-session context goes in a later message.
+    static_system_prompt = _STATIC_SYSTEM_PROMPT_TEMPLATE.format(
+        persona_name=config.persona_name, persona_prompt=config.persona_prompt
+    )
+    instructions_prompt = f"额外指示：{config.instructions}" if config.instructions else None
+    # The config is fixed for this instance; bind the fields used per call as closure locals
+    persona_name = config.persona_name
+    memory_window = config.memory_window
+
     async def _build_messages(input_data: PersonaDialogueInput) -> List[BaseMessage]:
         history = input_data.history
         user_message = input_data.user_message
@@ -107,75 +184,25 @@ async def persona_dialogue_function(config: PersonaDialogueFunctionConfig, build
 
 """
 
-        system_prompt_content = f"""你是{config.persona_name}。{config.persona_prompt}
-
-你正在参与一个多人自由对话。请注意：
-
-{user_info}{participants_info}【对话规则】
-1. 这是自然的多人在一起的互动对话，不是一问一答。
-2. 你可以：
-   - 回应其他人的观点（不需要被 @ 也可以回应）
-   - 提出自己的问题或想法
-   - 对感兴趣的话题发表看法
-   - @ 其他人邀请他们参与（格式：@某人，仅限参与者列表中的人）
-   - 对某个观点表示赞同或提出不同看法
-
-【何时发言】
-✅ 应该发言的情况：
-   - 有人 @ 你
-   - 话题与你的专长或兴趣相关
-   - 你对刚才的观点有独特见解
-   - 你想补充或纠正某个信息
-   - 对话冷场时可以提出新话题
-
-❌ 不要发言的情况：
-   - 别人已经说得很完整了
-   - 话题完全不在你的专长范围
-   - 你没有新的内容可补充
-   - 只是为了发言而发言
-   - **用户只说了简单的问候（如"你好"、"晚上好"）时，简短回应即可，不要自己延伸出新话题或提及不存在的上下文**
-
-【发言风格】
-- 保持你的个性特点：{config.persona_prompt}
-- 自然、真实，像真人在聊天
-- 可以简短，不需要每次都长篇大论
-- 可以表达情绪和态度
-- **根据对话实际内容回复，不要凭空编造或提及对话中没有出现过的事情**
-
-【身份与发言身份】
-- 只以你自己的身份发言，绝不假扮他人
-- 不要替他人说话或用他人的第一人称回复
-- 如果需要引用他人的观点，请用第三人称描述
-
-【重要规则】
-1. 如果下文中提供了「检索到的相关资料」，请优先基于这些资料回答，确保回答准确且符合角色设定。
-2. 只基于已有的对话历史回复，不要假设或编造对话中未出现的内容，不知道的内容调用网络检索工具。
-3. 如果用户只是简单问候，简短回应即可，不要过度延伸。
-
-【可用工具（高优先级）】
-- WebSearch：用于检索最新公开信息（新闻、版本、价格等）。当你对事实不确定、涉及时间/地点/事件/行程/更新的信息，或用户要求来源、“上网查/搜”时，主动调用该工具，并在回答中引用返回链接。用户没明确要求也要主动查，避免凭空回答。若搜索/网络失败或结果为空，请直说，不要假装已经查阅。
-- RagQuery：用于查询你的人物背景与相关资料。遇到涉及你背景、设定或过往信息的提问或讨论时，优先调用该工具获取片段并据此作答。
-
-工具使用原则：
-- 工具调用优先级仅次于系统提示；必要时请主动调用，无需等待用户明确要求。
-- 每轮可按需调用 1-2 次，避免过度调用导致延迟。
-- 在回答中标注引用，区分来自工具的结论与个人观点。
-
-记住：这是一群人在一起说话，要像真人一样自然互动！"""
-
-        messages: List[BaseMessage] = [SystemMessage(content=system_prompt_content)]
-
-        if config.instructions:
-            messages.append(SystemMessage(content=f"额外指示：{config.instructions}"))
+        # Cache-friendly order: static prefix > instructions > per-session context > history > user message
+        messages: List[BaseMessage] = [SystemMessage(content=static_system_prompt)]
+        if instructions_prompt:
+            messages.append(SystemMessage(content=instructions_prompt))
+        session_context = f"{user_info}{participants_info}".strip()
+        if session_context:
+            messages.append(SystemMessage(content=session_context))
 
         # 消息优先级：系统提示 > 历史 > 用户消息
-        for message in history[-config.memory_window:]:
+        # Same window as history[-memory_window:], iterated in place instead of copied
+        start = slice(-memory_window, None).indices(len(history))[0]
+        append = messages.append
+        for message in islice(history, start, None):
             speaker = message.get("speaker", "unknown")
             # 如果说话者是 "user"，使用用户的实际显示名称
-            if speaker == "user" and input_data.user_display_name:
-                speaker = input_data.user_display_name
+            if speaker == "user" and user_display_name:
+                speaker = user_display_name
             content = message.get("content", "")
-            messages.append(HumanMessage(content=f"{speaker}: {content}"))
+            append(HumanMessage(content=f"{speaker}: {content}"))
 
         if user_message:
             messages.append(HumanMessage(content=f"[用户刚刚说]: {user_message}\n\n现在轮到你发言了。"))
@@ -191,12 +218,10 @@ async def persona_dialogue_function(config: PersonaDialogueFunctionConfig, build
             return content
 
         if isinstance(content, list):
-            return "".join(part.get("text", str(part)) if isinstance(part, dict) else str(part) for part in content)
-
-        if hasattr(content, "__str__"):
-            return str(content)
+            return "".join(_content_part_text(part) for part in content)
 
-        return str(message)
+        # Every object has __str__, so this is the catch-all
+        return str(content)
 
     async def _respond_single(input_data: PersonaDialogueInput) -> PersonaDialogueOutput:
         messages = await _build_messages(input_data)
@@ -225,7 +250,7 @@ async def persona_dialogue_function(config: PersonaDialogueFunctionConfig, build
         messages = await _build_messages(input_data)
         state = ToolCallAgentGraphState(messages=messages)
         
-        logger.info(f"_respond_stream: Starting stream for persona {config.persona_name}")
+        logger.info(f"_respond_stream: Starting stream for persona {persona_name}")
         logger.info(f"_respond_stream: state messages count: {len(state.messages)}")
 
         try:
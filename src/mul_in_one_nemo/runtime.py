@@ -30,6 +30,7 @@ class MultiAgentRuntime:
         self.default_llm_name = "mul_in_one_nim"
         self.functions: Dict[str, Function] = {}
         self.persona_llms: Dict[str, str] = {}
+        self._stream_support: Dict[str, bool] = {}
 
     async def __aenter__(self) -> "MultiAgentRuntime":
         self._cm = WorkflowBuilder()
@@ -67,6 +68,7 @@ class MultiAgentRuntime:
         self.builder = None
         self.functions.clear()
         self.persona_llms.clear()
+        self._stream_support.clear()
 
     def _build_nim_config(
         self,
@@ -103,6 +105,14 @@ class MultiAgentRuntime:
         self.persona_llms[llm_name] = persona.name
         return llm_name
 
+    def supports_stream(self, persona_name: str) -> bool:
+        """Whether the persona's function streams natively; resolved once per persona."""
+        supported = self._stream_support.get(persona_name)
+        if supported is None:
+            supported = hasattr(self.functions[persona_name], 'astream')
+            self._stream_support[persona_name] = supported
+        return supported
+
     async def invoke(self, persona_name: str, payload: dict[str, object]) -> dict[str, str]:
         fn = self.functions[persona_name]
         result = await fn.ainvoke(payload)
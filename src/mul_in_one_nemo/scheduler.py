@@ -99,18 +99,19 @@ class TurnScheduler:
         
         # ===== 第二优先级：主动发言计算（无人被 @ 时） =====
         candidates: List[tuple[str, float]] = []
+        turn = self.turn
+        uniform = random.uniform
         
         for persona in self.personas.values():
-            since_last = self.turn - persona.last_turn
+            since_last = turn - persona.last_turn
+            
+            # 冷却期内不考虑
+            if since_last <= persona.cooldown:
+                continue
             
             # 基础分数：主动性
             score = persona.proactivity
             
-            # 冷却惩罚：刚说过话的降低优先级
-            if since_last <= persona.cooldown:
-                score -= 0.6
-                continue  # 冷却期内不考虑
-            
             # 连续发言惩罚：避免霸占对话
             if persona.consecutive_speaks >= 2:
                 score -= 0.3 * persona.consecutive_speaks
@@ -128,7 +129,7 @@ class TurnScheduler:
                 score += 0.2
             
             # 随机性：模拟人类对话的不可预测性
-            score += random.uniform(-0.1, 0.1)
+            score += uniform(-0.1, 0.1)
             
             candidates.append((persona.name, score))
         
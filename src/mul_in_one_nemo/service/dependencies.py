@@ -98,7 +98,8 @@ def get_rag_service() -> RAGService:
             raise ValueError(f"No API configuration found for persona {persona_id}")
         return config
 
-    return RAGService(api_config_resolver=api_config_resolver)
+    vector_index_type = os.environ.get("MUL_IN_ONE_VECTOR_INDEX", "IVF_FLAT").strip().upper()
+    return RAGService(api_config_resolver=api_config_resolver, vector_index_type=vector_index_type)
 
 
 
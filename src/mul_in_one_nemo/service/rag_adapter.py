@@ -144,16 +144,12 @@ class RagAdapter:
         """
         result = await self.search(query, username, persona_id, top_k, filters)
         
-        # Convert NAT Document format to LangChain Document
-        documents = []
-        for doc in result.results:
-            documents.append(
-                Document(
-                    page_content=doc.page_content,
-                    metadata=doc.metadata or {},
-                )
-            )
-        return documents
+        # Convert NAT Document format to LangChain Document. NAT already validated the
+        # fields (str content, dict metadata), so skip a second pydantic validation pass.
+        return [
+            Document.model_construct(page_content=doc.page_content, metadata=doc.metadata or {})
+            for doc in result.results
+        ]
 
     def close(self):
         """Close the shared MilvusClient connection."""
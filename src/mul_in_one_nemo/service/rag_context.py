@@ -6,7 +6,7 @@ system metadata to the LLM.
 """
 
 import contextvars
-from typing import Optional
+from typing import Any, Dict, Optional
 
 # Context variables for user and persona
 _user_context: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar(
@@ -15,6 +15,10 @@ _user_context: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar(
 _persona_context: contextvars.ContextVar[Optional[int]] = contextvars.ContextVar(
     'persona_context', default=None
 )
+# Retrieval results memoized for the current conversation turn (None = caching off)
+_retrieval_cache: contextvars.ContextVar[Optional[Dict[Any, Any]]] = contextvars.ContextVar(
+    'retrieval_cache', default=None
+)
 
 
 def set_rag_context(username: str, persona_id: int) -> None:
@@ -37,7 +41,22 @@ def get_rag_context() -> tuple[Optional[str], Optional[int]]:
     return _user_context.get(), _persona_context.get()
 
 
+def begin_retrieval_cache() -> None:
+    """Start an empty retrieval cache for the current conversation turn.
+
+    Identical RAG queries issued again within the turn are then served from
+    memory instead of re-embedding and re-searching Milvus.
+    """
+    _retrieval_cache.set({})
+
+
+def get_retrieval_cache() -> Optional[Dict[Any, Any]]:
+    """Get the current turn's retrieval cache, or None when caching is off."""
+    return _retrieval_cache.get()
+
+
 def clear_rag_context() -> None:
-    """Clear the RAG context for this async task."""
+    """Clear the RAG context (and the turn's retrieval cache) for this async task."""
     _user_context.set(None)
     _persona_context.set(None)
+    _retrieval_cache.set(None)
@@ -1,7 +1,9 @@
 """Service for handling Retrieval-Augmented Generation (RAG) functionalities."""
 
+import hashlib
 import logging
 import uuid
+from collections import OrderedDict, defaultdict
 from pathlib import Path
 from typing import Callable, List, Optional
 
@@ -80,6 +82,60 @@ logger = logging.getLogger(__name__)
 CONFIG_PATH = Path(__file__).parent.parent.parent.parent / "personas" / "api_configuration.yaml"
 CACHE_BASE_PATH = "./.tmp/data"
 DEFAULT_MILVUS_URI = "http://localhost:19530"
+# Milvus IVF index types usable for new collections. IVF_SQ8 stores vectors as int8 with a
+# per-dimension scale (~4x less index memory than IVF_FLAT's float32, small recall cost).
+VECTOR_INDEX_TYPES = ("IVF_FLAT", "IVF_SQ8")
+# Query vectors kept across retrievals; personas on the same embedding model share entries
+QUERY_EMBEDDING_CACHE_SIZE = 512
+
+
+class _QueryCachingEmbeddings(Embeddings):
+    """Delegating embedder that memoizes query vectors in a cache shared across embedders.
+
+    Entries are keyed by the wrapped model's identity, so embedders created per request for the
+    same model/endpoint reuse each other's query vectors. Document embedding is never cached.
+    """
+
+    def __init__(self, inner: Embeddings, cache: "OrderedDict[tuple, List[float]]", max_size: int):
+        self._inner = inner
+        self._cache = cache
+        self._max_size = max_size
+        self._identity = (
+            type(inner).__name__,
+            getattr(inner, "model", None),
+            getattr(inner, "openai_api_base", None),
+        )
+
+    def _key(self, text: str) -> tuple:
+        return self._identity + (hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest(),)
+
+    def _lookup(self, key: tuple) -> Optional[List[float]]:
+        vector = self._cache.get(key)
+        if vector is not None:
+            self._cache.move_to_end(key)
+        return vector
+
+    def _remember(self, key: tuple, vector: List[float]) -> List[float]:
+        self._cache[key] = vector
+        if len(self._cache) > self._max_size:
+            self._cache.popitem(last=False)
+        return vector
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self._inner.embed_documents(texts)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return await self._inner.aembed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        key = self._key(text)
+        vector = self._lookup(key)
+        return vector if vector is not None else self._remember(key, self._inner.embed_query(text))
+
+    async def aembed_query(self, text: str) -> List[float]:
+        key = self._key(text)
+        vector = self._lookup(key)
+        return vector if vector is not None else self._remember(key, await self._inner.aembed_query(text))
 
 
 class RAGService:
@@ -93,6 +149,8 @@ class RAGService:
         use_nat_retriever: bool = True,  # Flag to switch to NAT MilvusRetriever
         insert_batch_size: int = 64,
         delete_batch_size: int = 200,
+        vector_index_type: str = "IVF_FLAT",
+        retrieval_cache_size: int = 256,
     ):
         """RAG service.
 
@@ -100,22 +158,38 @@ class RAGService:
         - Production mode: inject `api_config_resolver(persona_id)->{"model","base_url","api_key","temperature"}`
           to fetch per-tenant/per-persona API settings from DB or SaaS.
         - NAT mode: When use_nat_retriever=True, uses RagAdapter with NAT's MilvusRetriever
+        - `vector_index_type` applies to newly created collections; "IVF_SQ8" quantizes to int8.
+        - `retrieval_cache_size` bounds the LRU of retrieve_documents results (0 disables it).
         """
+        if vector_index_type not in VECTOR_INDEX_TYPES:
+            raise ValueError(
+                f"Unsupported vector index type {vector_index_type!r}; expected one of {VECTOR_INDEX_TYPES}"
+            )
         self.config = self._load_config(config_path) if api_config_resolver is None else None
         self._api_config_resolver = api_config_resolver
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
+        # Stateless, so one instance serves every ingest path
+        self._splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
         self.default_top_k = default_top_k
         self.use_nat_retriever = use_nat_retriever
         self.insert_batch_size = max(1, insert_batch_size)
         self.delete_batch_size = max(1, delete_batch_size)
+        self.vector_index_type = vector_index_type
+        self.retrieval_cache_size = max(0, retrieval_cache_size)
+        # (collection, version, top_k, query digest) -> documents. Ingest/delete bump the
+        # collection's version, so stale entries are never served and simply age out.
+        self._retrieval_cache: OrderedDict[tuple, List[Document]] = OrderedDict()
+        self._collection_versions: defaultdict[str, int] = defaultdict(int)
+        self._query_embeddings: OrderedDict[tuple, List[float]] = OrderedDict()
+        self._collection_locks: defaultdict[str, asyncio.Lock] = defaultdict(asyncio.Lock)
         
         # Initialize NAT adapter if enabled
         self._rag_adapter: Optional[RagAdapter] = None
         if use_nat_retriever:
             # Create adapter with embedder factory that wraps _create_embedder
-            async def embedder_factory(persona_id: int, username: Optional[str]) -> OpenAIEmbeddings:
-                return await self._create_embedder(persona_id)
+            async def embedder_factory(persona_id: int, username: Optional[str]) -> Embeddings:
+                return self._with_query_cache(await self._create_embedder(persona_id))
             self._rag_adapter = RagAdapter(
                 embedder_factory=embedder_factory,
                 milvus_uri=DEFAULT_MILVUS_URI,
@@ -200,6 +274,10 @@ class RAGService:
                 request_timeout=30.0,  # 30秒超时
             )
 
+    def _with_query_cache(self, embedder: Embeddings) -> Embeddings:
+        """Wrap a retrieval embedder so repeated queries skip the embedding API call."""
+        return _QueryCachingEmbeddings(embedder, self._query_embeddings, QUERY_EMBEDDING_CACHE_SIZE)
+
     def _create_embedder_sync(self, persona_id: Optional[int] = None) -> Embeddings:
         """Create embedder synchronously (for prototype mode)."""
         api_config = self._resolve_api_config_sync(persona_id)
@@ -260,6 +338,10 @@ class RAGService:
             temperature=api_config.get("temperature", 0.4),
         )
 
+    def _invalidate_retrievals(self, collection_name: str) -> None:
+        """Make cached retrievals for `collection_name` unreachable after its contents change."""
+        self._collection_versions[collection_name] += 1
+
     def _create_collection(self, collection_name: str, dim: int):
         """Creates a Milvus collection with the standard schema."""
         logger.info(f"Creating collection {collection_name} with dim={dim}")
@@ -276,7 +358,7 @@ class RAGService:
         
         # Create index
         index_params = {
-            "index_type": "IVF_FLAT",
+            "index_type": self.vector_index_type,
             "metric_type": "L2",
             "params": {"nlist": 1024},
         }
@@ -284,6 +366,21 @@ class RAGService:
         collection.load()
         logger.info(f"Collection {collection_name} created and loaded.")
 
+    @staticmethod
+    def _document_columns(split_docs: List[Document], default_source: str) -> tuple[list, list, list]:
+        """Pivot chunks into the [document_id, text, source] columns in a single pass."""
+        doc_ids: list[str] = []
+        texts: list[str] = []
+        sources: list[str] = []
+        add_id, add_text, add_source = doc_ids.append, texts.append, sources.append
+        # One urandom read for the whole batch instead of one per uuid4() call
+        entropy = os.urandom(16 * len(split_docs))
+        for i, d in enumerate(split_docs):
+            add_id(str(uuid.UUID(bytes=entropy[16 * i:16 * i + 16], version=4)))
+            add_text(d.page_content)
+            add_source(d.metadata.get("source", default_source))
+        return doc_ids, texts, sources
+
     def _insert_columns_batched(self, collection: Collection, data_columns: list[list], batch_size: int):
         """Insert columnar data into Milvus in smaller batches to reduce peak memory."""
         if not data_columns:
@@ -319,8 +416,7 @@ class RAGService:
         # 2. Load, parse, and split the document
         loader = BSHTMLLoader(filepath)
         docs = loader.load()
-        splitter = RecursiveCharacterTextSplitter(chunk_size=self.chunk_size, chunk_overlap=self.chunk_overlap)
-        split_docs = splitter.split_documents(docs)
+        split_docs = self._splitter.split_documents(docs)
         logger.info(f"Document split into {len(split_docs)} chunks.")
 
         # 3. Create Milvus vector store and add documents
@@ -404,9 +500,7 @@ class RAGService:
         collection = Collection(collection_name)
         
         # Prepare data with string UUIDs
-        doc_ids = [str(uuid.uuid4()) for _ in split_docs]
-        texts = [d.page_content for d in split_docs]
-        sources = [d.metadata.get("source", "unknown") for d in split_docs]
+        doc_ids, texts, sources = self._document_columns(split_docs, "unknown")
         
         logger.info(f"Adding {len(doc_ids)} document chunks to Milvus...")
         # Safety checks to ensure one vector per chunk and equal column lengths
@@ -425,8 +519,12 @@ class RAGService:
         logger.info(
             f"Inserting data columns: cols={len(data_columns)} rows={len(doc_ids)} into {collection_name}"
         )
-        self._insert_columns_batched(collection, data_columns, self.insert_batch_size)
-        collection.flush()
+        try:
+            self._insert_columns_batched(collection, data_columns, self.insert_batch_size)
+            collection.flush()
+        finally:
+            # A failed insert may still have written some batches
+            self._invalidate_retrievals(collection_name)
         logger.info(f"Successfully ingested {len(doc_ids)} document chunks into '{collection_name}'.")
 
         # Clean up cache
@@ -460,11 +558,68 @@ class RAGService:
         doc = Document(page_content=text, metadata={"source": source})
 
         # 2. Split the document
-        splitter = RecursiveCharacterTextSplitter(chunk_size=self.chunk_size, chunk_overlap=self.chunk_overlap)
-        split_docs = splitter.split_documents([doc])
+        split_docs = self._splitter.split_documents([doc])
         logger.info(f"Text split into {len(split_docs)} chunks.")
 
-        # 3. Create Milvus vector store and add documents
+        return await self._embed_and_store(
+            split_docs, persona_id, collection_name, default_source=source, expected_dim=expected_dim
+        )
+
+    async def ingest_texts(
+        self,
+        items: List[tuple[str, Optional[str]]],
+        persona_id: int,
+        username: str,
+        expected_dim: Optional[int] = None,
+        commit_every: Optional[int] = None,
+    ) -> dict:
+        """
+        Ingests several raw texts in one pass: all chunks share a single embedding
+        request and a single batched Milvus insert/flush.
+
+        `items` is a list of `(text, source)` pairs; a `None` source falls back to "raw_text".
+        With `commit_every`, chunks are embedded and flushed `commit_every` at a time so
+        large requests never hold every vector in memory at once.
+        """
+        if not items:
+            raise ValueError("No texts provided for ingestion")
+
+        docs: List[Document] = []
+        for text, source in items:
+            if not isinstance(text, str):
+                raise TypeError(f"contents must be str, got {type(text).__name__}")
+            if not text.strip():
+                raise ValueError("Text content is empty or contains only whitespace")
+            docs.append(Document(page_content=text, metadata={"source": source or "raw_text"}))
+
+        collection_name = f"u_{username}_persona_{persona_id}_rag"
+        logger.info(f"Starting batch ingestion of {len(docs)} texts into collection: {collection_name}")
+
+        split_docs = self._splitter.split_documents(docs)
+        logger.info(f"{len(docs)} texts split into {len(split_docs)} chunks.")
+
+        step = commit_every if commit_every and commit_every > 0 else len(split_docs)
+        documents_added = 0
+        for start in range(0, len(split_docs), step):
+            result = await self._embed_and_store(
+                split_docs[start:start + step],
+                persona_id,
+                collection_name,
+                default_source="raw_text",
+                expected_dim=expected_dim,
+            )
+            documents_added += result["documents_added"]
+        return {"status": "success", "documents_added": documents_added, "collection_name": collection_name}
+
+    async def _embed_and_store(
+        self,
+        split_docs: List[Document],
+        persona_id: int,
+        collection_name: str,
+        default_source: str,
+        expected_dim: Optional[int] = None,
+    ) -> dict:
+        """Embed already-split chunks and insert them into the persona's Milvus collection."""
         if self.embedder:
             embedder = self.embedder
         else:
@@ -500,7 +655,43 @@ class RAGService:
             logger.warning(f"Embeddings normalization warning: {e}. Proceeding with raw embeddings list.")
             actual_dim = len(embeddings[0]) if embeddings and len(embeddings) > 0 else None
         
-        # Connect to Milvus and insert with manual UUIDs
+        # Prepare data with string UUIDs
+        doc_ids, texts, sources = self._document_columns(split_docs, default_source)
+        
+        logger.info(f"Adding {len(doc_ids)} document chunks to Milvus...")
+        # Safety checks to ensure one vector per chunk and equal column lengths
+        len_ids = len(doc_ids)
+        len_vecs = len(embeddings)
+        len_texts = len(texts)
+        len_srcs = len(sources)
+        if not (len_ids == len_vecs == len_texts == len_srcs):
+            logger.error(
+                f"Column length mismatch before insert: ids={len_ids} vecs={len_vecs} texts={len_texts} srcs={len_srcs}"
+            )
+            raise ValueError("Column length mismatch: ensure one embedding per chunk")
+
+        # Column-based insert required by Milvus: [document_id, vector, text, source]
+        data_columns = [doc_ids, embeddings, texts, sources]
+        logger.info(
+            f"Inserting data columns: cols={len(data_columns)} rows={len(doc_ids)} into {collection_name}"
+        )
+        # pymilvus is blocking: run it off the event loop, and serialize per collection so
+        # concurrent ingests cannot race on has_collection/_create_collection.
+        async with self._collection_locks[collection_name]:
+            try:
+                await asyncio.to_thread(
+                    self._store_columns, collection_name, data_columns, actual_dim
+                )
+            finally:
+                # A failed insert may still have written some batches
+                self._invalidate_retrievals(collection_name)
+        logger.info(f"Successfully ingested {len(doc_ids)} document chunks into '{collection_name}'.")
+        
+        return {"status": "success", "documents_added": len(doc_ids), "collection_name": collection_name}
+
+    def _store_columns(self, collection_name: str, data_columns: list[list], actual_dim: Optional[int]) -> None:
+        """Create/validate the collection, insert `[document_id, vector, text, source]` columns and flush."""
+        embeddings = data_columns[1]
         connections.connect(alias="default", uri=DEFAULT_MILVUS_URI)
         
         # Ensure collection exists
@@ -527,34 +718,8 @@ class RAGService:
                     break
 
         collection = Collection(collection_name)
-        
-        # Prepare data with string UUIDs
-        doc_ids = [str(uuid.uuid4()) for _ in split_docs]
-        texts = [d.page_content for d in split_docs]
-        sources = [d.metadata.get("source", source) for d in split_docs]
-        
-        logger.info(f"Adding {len(doc_ids)} document chunks to Milvus...")
-        # Safety checks to ensure one vector per chunk and equal column lengths
-        len_ids = len(doc_ids)
-        len_vecs = len(embeddings)
-        len_texts = len(texts)
-        len_srcs = len(sources)
-        if not (len_ids == len_vecs == len_texts == len_srcs):
-            logger.error(
-                f"Column length mismatch before insert: ids={len_ids} vecs={len_vecs} texts={len_texts} srcs={len_srcs}"
-            )
-            raise ValueError("Column length mismatch: ensure one embedding per chunk")
-
-        # Column-based insert required by Milvus: [document_id, vector, text, source]
-        data_columns = [doc_ids, embeddings, texts, sources]
-        logger.info(
-            f"Inserting data columns: cols={len(data_columns)} rows={len(doc_ids)} into {collection_name}"
-        )
         self._insert_columns_batched(collection, data_columns, self.insert_batch_size)
         collection.flush()
-        logger.info(f"Successfully ingested {len(doc_ids)} document chunks into '{collection_name}'.")
-        
-        return {"status": "success", "documents_added": len(doc_ids), "collection_name": collection_name}
 
     async def delete_documents_by_source(self, persona_id: int, username: str, source: str) -> None:
         """
@@ -564,6 +729,7 @@ class RAGService:
         
         collection_name = f"u_{username}_persona_{persona_id}_rag"
         logger.info(f"Attempting to delete documents with source='{source}' from {collection_name}")
+        self._invalidate_retrievals(collection_name)
 
         try:
             # Connect to Milvus
@@ -587,21 +753,28 @@ class RAGService:
             # First query to get IDs, then delete by IDs
             expr = f'source == "{source}"'
             total_deleted = 0
-            while True:
-                query_results = collection.query(
-                    expr=expr, output_fields=["document_id"], limit=self.delete_batch_size
-                )
-                if not query_results:
-                    break
+            # Stream matching IDs page by page in a single pass; the iterator's primary-key
+            # cursor is unaffected by the deletes, so matches are never re-scanned
+            iterator = collection.query_iterator(
+                batch_size=self.delete_batch_size, expr=expr, output_fields=["document_id"]
+            )
+            try:
+                while True:
+                    page = iterator.next()
+                    if not page:
+                        break
+
+                    ids_to_delete = [r["document_id"] for r in page]
+                    delete_expr = f"document_id in {ids_to_delete}"
+                    delete_result = collection.delete(delete_expr)
+                    total_deleted += getattr(delete_result, "delete_count", 0)
+                    logger.info(
+                        "Deleted batch of %d (total so far: %d) from '%s'",
+                        len(ids_to_delete), total_deleted, collection_name,
+                    )
+            finally:
+                iterator.close()
 
-                ids_to_delete = [r["document_id"] for r in query_results]
-                delete_expr = f"document_id in {ids_to_delete}"
-                delete_result = collection.delete(delete_expr)
-                total_deleted += getattr(delete_result, "delete_count", 0)
-                logger.info(
-                    f"Deleted batch of {len(ids_to_delete)} (total so far: {total_deleted}) from '{collection_name}'"
-                )
-            
             if total_deleted == 0:
                 logger.info(f"No documents found with source='{source}' in '{collection_name}'.")
             else:
@@ -614,6 +787,37 @@ class RAGService:
             # Do not re-raise, just log, to avoid breaking the main flow on deletion failure
 
 
+    async def list_sources(self, persona_id: int, username: str) -> List[str]:
+        """
+        Returns the distinct `source` values stored in the persona's collection.
+        """
+        collection_name = f"u_{username}_persona_{persona_id}_rag"
+        return await asyncio.to_thread(self._query_sources, collection_name)
+
+    def _query_sources(self, collection_name: str) -> List[str]:
+        from pymilvus import utility
+
+        connections.connect(alias="default", uri=DEFAULT_MILVUS_URI)
+        if not utility.has_collection(collection_name):
+            return []
+
+        collection = Collection(name=collection_name)
+        collection.load()
+        # Page through the source column so large collections stay under Milvus' query window
+        iterator = collection.query_iterator(
+            batch_size=self.delete_batch_size, expr="", output_fields=["source"]
+        )
+        sources: set[str] = set()
+        try:
+            while True:
+                page = iterator.next()
+                if not page:
+                    break
+                sources.update(row["source"] for row in page)
+        finally:
+            iterator.close()
+        return sorted(sources)
+
     async def delete_collection(self, persona_id: int, username: str) -> None:
         """
         Deletes the entire Milvus collection for a specific persona.
@@ -622,6 +826,7 @@ class RAGService:
         
         collection_name = f"u_{username}_persona_{persona_id}_rag"
         logger.info(f"Attempting to delete collection: {collection_name}")
+        self._invalidate_retrievals(collection_name)
 
         try:
             # Connect to Milvus
@@ -653,6 +858,7 @@ class RAGService:
             embedder = self.embedder
         else:
             embedder = await self._create_embedder(persona_id)
+        embedder = self._with_query_cache(embedder)
             
         vector_store = Milvus(
             embedding_function=embedder,
@@ -674,6 +880,19 @@ class RAGService:
             f"query='{query[:50]}...', top_k={top_k}, nat_mode={self.use_nat_retriever}"
         )
         
+        collection_name = f"u_{username}_persona_{persona_id}_rag"
+        cache_key = (
+            collection_name,
+            self._collection_versions[collection_name],
+            top_k,
+            hashlib.blake2b(query.encode("utf-8"), digest_size=16).digest(),
+        )
+        cached = self._retrieval_cache.get(cache_key)
+        if cached is not None:
+            self._retrieval_cache.move_to_end(cache_key)
+            logger.info(f"Retrieved {len(cached)} documents from cache")
+            return list(cached)
+        
         try:
             if self.use_nat_retriever and self._rag_adapter:
                 # Use NAT adapter (modern approach)
@@ -689,6 +908,10 @@ class RAGService:
                 docs = await retriever.ainvoke(query)
             
             logger.info(f"Retrieved {len(docs)} documents")
+            if self.retrieval_cache_size:
+                self._retrieval_cache[cache_key] = list(docs)
+                if len(self._retrieval_cache) > self.retrieval_cache_size:
+                    self._retrieval_cache.popitem(last=False)
             return docs
             
         except Exception as e:
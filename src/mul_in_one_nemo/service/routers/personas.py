@@ -161,12 +161,25 @@ class PersonaIngestRequest(BaseModel):
 class PersonaTextIngestRequest(BaseModel):
     text: str = Field(..., description="Raw text to ingest for RAG")
 
+class PersonaTextBatchItem(BaseModel):
+    text: str = Field(..., description="Raw text to ingest for RAG")
+    source: str | None = Field(default=None, max_length=256, description="Source label stored with the chunks")
+
+class PersonaTextBatchIngestRequest(BaseModel):
+    items: list[PersonaTextBatchItem] = Field(..., min_length=1, max_length=500, description="Texts to ingest in one pass")
+    commit_every: int | None = Field(default=None, ge=1, le=500, description="Embed and flush this many chunks at a time")
+
 class PersonaIngestResponse(BaseModel):
     status: str = Field(..., description="Status of the ingestion process")
     documents_added: int | None = Field(default=None, description="Number of document chunks added")
     collection_name: str | None = Field(default=None, description="Milvus collection name used")
 
 
+class PersonaSourcesResponse(BaseModel):
+    sources: list[str] = Field(default_factory=list, description="Distinct document sources in the knowledge base")
+    total: int = Field(..., description="Number of distinct sources")
+
+
 class RAGRetrieveRequest(BaseModel):
     query: str = Field(..., description="Query text for RAG retrieval")
     top_k: int = Field(default=4, ge=1, le=100, description="Number of documents to retrieve")
@@ -182,6 +195,14 @@ class RAGRetrieveResponse(BaseModel):
     total_retrieved: int = Field(..., description="Total number of passages retrieved")
 
 
+class RAGBatchRetrieveRequest(BaseModel):
+    queries: list[str] = Field(..., min_length=1, max_length=64, description="Query texts retrieved in one request")
+
+
+class RAGBatchRetrieveResponse(BaseModel):
+    results: list[RAGRetrieveResponse] = Field(default_factory=list, description="Per-query results, in request order")
+
+
 class EmbeddingConfigUpdate(BaseModel):
     api_profile_id: int | None = Field(default=None, ge=1, description="API Profile ID for embedding model")
     actual_embedding_dim: int | None = Field(default=None, ge=32, le=8192, description="Actual embedding dimension to use (32-8192)")
@@ -499,6 +520,45 @@ async def ingest_text(
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(exc)) from exc
 
 
+@router.post("/personas/{persona_id}/ingest_text_batch", response_model=PersonaIngestResponse, status_code=status.HTTP_200_OK)
+async def ingest_text_batch(
+    persona_id: int,
+    payload: PersonaTextBatchIngestRequest,
+    username: str = Query(..., description="User identifier"),
+    rag_service: RAGService = Depends(get_rag_service),
+) -> PersonaIngestResponse:
+    """Ingest many texts with one embedding call and one Milvus flush (or one per `commit_every` chunks)."""
+    try:
+        logger.info("Batch text ingest for persona_id=%s user=%s (items=%s)", persona_id, username, len(payload.items))
+        result = await rag_service.ingest_texts(
+            [(item.text, item.source) for item in payload.items],
+            persona_id,
+            username,
+            commit_every=payload.commit_every,
+        )
+        return PersonaIngestResponse(
+            status=result["status"],
+            documents_added=result["documents_added"],
+            collection_name=result["collection_name"],
+        )
+    except Exception as exc:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(exc)) from exc
+
+
+@router.get("/personas/{persona_id}/sources", response_model=PersonaSourcesResponse)
+async def list_persona_sources(
+    persona_id: int,
+    username: str = Query(..., description="User identifier"),
+    rag_service: RAGService = Depends(get_rag_service),
+) -> PersonaSourcesResponse:
+    """List the sources already ingested into a Persona's knowledge base."""
+    try:
+        sources = await rag_service.list_sources(persona_id, username)
+        return PersonaSourcesResponse(sources=sources, total=len(sources))
+    except Exception as exc:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(exc)) from exc
+
+
 @router.post("/personas/{persona_id}/rag/retrieve", response_model=RAGRetrieveResponse, status_code=status.HTTP_200_OK)
 async def retrieve_documents(
     persona_id: int,
@@ -520,24 +580,57 @@ async def retrieve_documents(
             top_k=top_k
         )
         
-        # Convert Document objects to RAGPassage objects
-        passages = [
-            RAGPassage(
-                text=doc.page_content,
-                source=doc.metadata.get("source") if doc.metadata else None
-            )
-            for doc in docs
-        ]
+        return _to_retrieve_response(docs)
+    except Exception as exc:
+        logger.exception("Error retrieving documents: %s", exc)
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(exc)) from exc
+
+
+@router.post("/personas/{persona_id}/rag/retrieve_batch", response_model=RAGBatchRetrieveResponse, status_code=status.HTTP_200_OK)
+async def retrieve_documents_batch(
+    persona_id: int,
+    payload: RAGBatchRetrieveRequest,
+    username: str = Query(..., description="User identifier"),
+    top_k: int = Query(default=4, ge=1, le=100, description="Number of documents to retrieve per query"),
+    rag_service: RAGService = Depends(get_rag_service),
+) -> RAGBatchRetrieveResponse:
+    """Retrieve documents for several queries in one request; retrievals run concurrently."""
+    try:
+        logger.info("Batch retrieving documents for persona_id=%s user=%s (queries=%s) top_k=%s",
+                   persona_id, username, len(payload.queries), top_k)
         
-        return RAGRetrieveResponse(
-            passages=passages,
-            total_retrieved=len(passages)
+        doc_lists = await asyncio.gather(
+            *(
+                rag_service.retrieve_documents(
+                    query=query,
+                    persona_id=persona_id,
+                    username=username,
+                    top_k=top_k
+                )
+                for query in payload.queries
+            )
         )
+        return RAGBatchRetrieveResponse(results=[_to_retrieve_response(docs) for docs in doc_lists])
     except Exception as exc:
-        logger.exception("Error retrieving documents: %s", exc)
+        logger.exception("Error batch retrieving documents: %s", exc)
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(exc)) from exc
 
 
+def _to_retrieve_response(docs: list) -> RAGRetrieveResponse:
+    """Convert retrieved Document objects to the RAGPassage response shape."""
+    passages = [
+        RAGPassage(
+            text=doc.page_content,
+            source=doc.metadata.get("source") if doc.metadata else None
+        )
+        for doc in docs
+    ]
+    return RAGRetrieveResponse(
+        passages=passages,
+        total_retrieved=len(passages)
+    )
+
+
 @router.post("/personas/{persona_id}/refresh_rag", response_model=PersonaIngestResponse, status_code=status.HTTP_200_OK)
 async def refresh_persona_rag(
     persona_id: int,
@@ -4,9 +4,10 @@ from __future__ import annotations
 
 import asyncio
 import contextlib
+import math
 import re
 from abc import ABC, abstractmethod
-from collections import defaultdict
+from collections import Counter, defaultdict
 from dataclasses import replace
 from typing import AsyncIterator, Dict, List
 import logging
@@ -22,11 +23,18 @@ from mul_in_one_nemo.service.repositories import (
     PersonaDataRepository,
     SQLAlchemyPersonaRepository,
 )
-from mul_in_one_nemo.service.rag_context import set_rag_context, clear_rag_context
+from mul_in_one_nemo.service.rag_context import (
+    begin_retrieval_cache,
+    clear_rag_context,
+    set_rag_context,
+)
 from mul_in_one_nemo.service.interrupts import consume_interrupt
 
 logger = logging.getLogger(__name__)
 
+# Latin word-like tokens or single Han characters, for the stop policy's token vectors
+_SIMILARITY_TOKEN_RE = re.compile(r"[A-Za-z0-9_]+|[\u4e00-\u9fff]")
+
 
 class RuntimeAdapter(ABC):
     """Adapter that bridges SessionService with runtime execution."""
@@ -86,26 +94,34 @@ class NemoRuntimeAdapter(RuntimeAdapter):
         """
         if not text:
             return {}
-        lowered = text.lower()
-        tokens = re.findall(r"[A-Za-z0-9_]+|[\u4e00-\u9fff]", lowered)
-        counts: Dict[str, int] = {}
-        for t in tokens:
-            counts[t] = counts.get(t, 0) + 1
-        return counts
+        # Counter tallies an iterable in C (collections._count_elements)
+        return Counter(_SIMILARITY_TOKEN_RE.findall(text.lower()))
 
     @staticmethod
-    def _cosine_similarity(vec_a: Dict[str, int], vec_b: Dict[str, int]) -> float:
+    def _vector_norm(vec: Dict[str, int]) -> float:
+        # math.hypot computes the Euclidean norm in C
+        return math.hypot(*vec.values())
+
+    @classmethod
+    def _cosine_similarity(
+        cls,
+        vec_a: Dict[str, int],
+        vec_b: Dict[str, int],
+        norm_a: float | None = None,
+        norm_b: float | None = None,
+    ) -> float:
+        """Cosine of two token-count vectors; pass precomputed norms to skip recomputing them."""
         if not vec_a or not vec_b:
             return 0.0
-        # dot product
-        keys = vec_a.keys() & vec_b.keys()
-        dot = sum(vec_a[k] * vec_b[k] for k in keys)
+        # dot product: probe the larger mapping with the keys of the smaller one
+        if len(vec_a) > len(vec_b):
+            vec_a, vec_b, norm_a, norm_b = vec_b, vec_a, norm_b, norm_a
+        get_b = vec_b.get
+        dot = sum(v * get_b(k, 0) for k, v in vec_a.items())
         if dot == 0:
             return 0.0
-        # norms
-        import math
-        na = math.sqrt(sum(v * v for v in vec_a.values()))
-        nb = math.sqrt(sum(v * v for v in vec_b.values()))
+        na = cls._vector_norm(vec_a) if norm_a is None else norm_a
+        nb = cls._vector_norm(vec_b) if norm_b is None else norm_b
         if na == 0 or nb == 0:
             return 0.0
         return dot / (na * nb)
@@ -243,6 +259,8 @@ class NemoRuntimeAdapter(RuntimeAdapter):
         # Context will be available to all async operations in this task
         # Note: We'll update persona_id per speaker during the conversation loop
         set_rag_context(username=username, persona_id=None)
+        # Personas in one turn often repeat the same RagQuery; memoize results until the turn ends
+        begin_retrieval_cache()
         
         try:
             # Create a mapping from persona name to persona object for easy lookup
@@ -313,6 +331,8 @@ class NemoRuntimeAdapter(RuntimeAdapter):
             seen_speakers: set[str] = set()
             seen_mentions: set[str] = set(pending_user_mentions)
             prev_round_vec: Dict[str, int] | None = None
+            # Norm of prev_round_vec, computed once when the round is scored and reused next round
+            prev_round_norm: float | None = None
             high_sim_streak = 0
             heat_threshold = float(getattr(self._settings, "stop_heat_threshold", 0.6))
             sim_threshold = float(getattr(self._settings, "stop_similarity_threshold", 0.9))
@@ -488,12 +508,14 @@ class NemoRuntimeAdapter(RuntimeAdapter):
 
                 # Redundancy via cosine similarity on lightweight tokens
                 curr_vec = self._tokenize_for_similarity(round_text_total)
-                sim = self._cosine_similarity(prev_round_vec or {}, curr_vec)
+                curr_norm = self._vector_norm(curr_vec)
+                sim = self._cosine_similarity(prev_round_vec or {}, curr_vec, prev_round_norm, curr_norm)
                 if sim >= sim_threshold and not has_question and not new_mentions:
                     high_sim_streak += 1
                 else:
                     high_sim_streak = 0
                 prev_round_vec = curr_vec
+                prev_round_norm = curr_norm
 
                 # Decide stop: redundancy streak or low heat average over patience
                 if len(heat_window) >= heat_window.maxlen and not soft_closing:
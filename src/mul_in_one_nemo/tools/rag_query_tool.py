@@ -7,6 +7,7 @@ Security: username and persona_id are injected from config/context at runtime,
 not exposed to LLM to prevent token waste and security issues (hallucination risks).
 """
 
+import hashlib
 import logging
 from typing import List, AsyncGenerator, Optional
 
@@ -18,10 +19,13 @@ from nat.cli.register_workflow import register_function
 from nat.data_models.function import FunctionBaseConfig
 
 from mul_in_one_nemo.service.rag_dependencies import get_rag_service
-from mul_in_one_nemo.service.rag_context import get_rag_context
+from mul_in_one_nemo.service.rag_context import get_rag_context, get_retrieval_cache
 
 logger = logging.getLogger(__name__)
 
+# Upper bound on distinct queries memoized per conversation turn
+MAX_CACHED_QUERIES = 256
+
 
 class RagQueryInput(BaseModel):
     """Input schema exposed to LLM - only contains query and top_k.
@@ -84,6 +88,18 @@ async def rag_query_tool(config: RagQueryToolConfig, builder):
                 f"query='{input_data.query[:50]}...', top_k={input_data.top_k}"
             )
             
+            cache = get_retrieval_cache()
+            cache_key = (
+                username,
+                persona_id,
+                input_data.top_k,
+                hashlib.blake2b(input_data.query.encode("utf-8"), digest_size=16).digest(),
+            )
+            if cache is not None and cache_key in cache:
+                out = cache[cache_key]
+                logger.info(f"RAG query served {len(out)} cached passages")
+                return RagQueryOutput(passages=list(out))
+            
             rag_service = get_rag_service()
             # Note: retrieve_documents signature now requires username
             docs = await rag_service.retrieve_documents(
@@ -100,9 +116,11 @@ async def rag_query_tool(config: RagQueryToolConfig, builder):
                 )
                 for d in docs
             ]
+            if cache is not None and len(cache) < MAX_CACHED_QUERIES:
+                cache[cache_key] = out
             
             logger.info(f"RAG query returned {len(out)} passages")
-            return RagQueryOutput(passages=out)
+            return RagQueryOutput(passages=list(out))
             
         except Exception as e:
             logger.error(f"RagQueryTool failed: {e}", exc_info=True)
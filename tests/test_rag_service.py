@@ -2,7 +2,7 @@ import asyncio
 import os
 import sys
 from pathlib import Path
-from unittest.mock import AsyncMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 import yaml
@@ -105,3 +105,139 @@ async def test_ingest_url_scrape_failure(
         mock_aembed.assert_not_called() # Embedder should not be called on scrape failure
         mock_milvus_vector_store.aadd_documents.assert_not_called()
 
+
+
+@pytest.fixture
+def mock_pymilvus():
+    """Mocks the pymilvus entry points used by the manual insert path."""
+    with patch("mul_in_one_nemo.service.rag_service.connections") as mock_connections, \
+         patch("mul_in_one_nemo.service.rag_service.utility") as mock_utility, \
+         patch("mul_in_one_nemo.service.rag_service.Collection") as mock_collection_cls:
+        mock_utility.has_collection.return_value = True
+        mock_collection = MagicMock()
+        mock_collection.schema.fields = []
+        mock_collection_cls.return_value = mock_collection
+        yield mock_collection
+
+
+@pytest.mark.asyncio
+async def test_ingest_texts_success(
+    rag_service_instance: RAGService,
+    mock_pymilvus: MagicMock,
+):
+    """Test batch text ingestion keeps per-item sources and embeds once."""
+    with patch("mul_in_one_nemo.service.rag_service.OpenAIEmbeddings.aembed_documents") as mock_aembed:
+        mock_aembed.return_value = [[0.1] * 8, [0.2] * 8]
+
+        result = await rag_service_instance.ingest_texts(
+            [("first text", "qa_dataset_1"), ("second text", None)], 7, "alice"
+        )
+
+    assert result["status"] == "success"
+    assert result["documents_added"] == 2
+    assert result["collection_name"] == "u_alice_persona_7_rag"
+
+    mock_aembed.assert_called_once_with(["first text", "second text"])
+    mock_pymilvus.insert.assert_called_once()
+    doc_ids, vectors, texts, sources = mock_pymilvus.insert.call_args.args[0]
+    assert texts == ["first text", "second text"]
+    assert sources == ["qa_dataset_1", "raw_text"]
+    mock_pymilvus.flush.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_ingest_texts_commit_every(
+    rag_service_instance: RAGService,
+    mock_pymilvus: MagicMock,
+):
+    """Test batch text ingestion embeds and flushes per `commit_every` chunks."""
+    with patch("mul_in_one_nemo.service.rag_service.OpenAIEmbeddings.aembed_documents") as mock_aembed:
+        mock_aembed.side_effect = lambda contents: [[0.1] * 8 for _ in contents]
+
+        result = await rag_service_instance.ingest_texts(
+            [("a", "s1"), ("b", "s2"), ("c", "s3")], 7, "alice", commit_every=2
+        )
+
+    assert result["documents_added"] == 3
+    assert [c.args[0] for c in mock_aembed.call_args_list] == [["a", "b"], ["c"]]
+    assert mock_pymilvus.flush.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_ingest_texts_rejects_invalid_items(
+    rag_service_instance: RAGService,
+    mock_pymilvus: MagicMock,
+):
+    """Test batch text ingestion validates every item before embedding."""
+    with patch("mul_in_one_nemo.service.rag_service.OpenAIEmbeddings.aembed_documents") as mock_aembed:
+        with pytest.raises(ValueError, match="No texts provided"):
+            await rag_service_instance.ingest_texts([], 7, "alice")
+        with pytest.raises(ValueError, match="empty or contains only whitespace"):
+            await rag_service_instance.ingest_texts([("ok", None), ("   ", None)], 7, "alice")
+        with pytest.raises(TypeError, match="contents must be str"):
+            await rag_service_instance.ingest_texts([(["not", "a", "str"], None)], 7, "alice")
+
+        mock_aembed.assert_not_called()
+    mock_pymilvus.insert.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_retrieve_documents_cache(
+    mock_api_config_path: Path,
+    mock_pymilvus: MagicMock,
+    tmp_path: Path,
+):
+    """Test cached retrievals are reused, invalidated by ingest/delete, and LRU-evicted."""
+    from langchain_core.documents import Document
+
+    service = RAGService(config_path=mock_api_config_path, use_nat_retriever=False, retrieval_cache_size=2)
+    retriever = MagicMock()
+    retriever.ainvoke = AsyncMock(side_effect=lambda query: [Document(page_content=f"{query}-hit")])
+
+    with patch.object(service, "_create_retriever", AsyncMock(return_value=retriever)), \
+         patch("mul_in_one_nemo.service.rag_service.OpenAIEmbeddings.aembed_documents") as mock_aembed:
+        mock_aembed.side_effect = lambda contents: [[0.1] * 8 for _ in contents]
+
+        # Repeated query is served from cache; callers get their own list
+        first = await service.retrieve_documents("q1", 7, "alice")
+        first.clear()
+        second = await service.retrieve_documents("q1", 7, "alice")
+        assert [d.page_content for d in second] == ["q1-hit"]
+        assert retriever.ainvoke.await_count == 1
+
+        # Different top_k or persona is a different key
+        await service.retrieve_documents("q1", 7, "alice", top_k=2)
+        assert retriever.ainvoke.await_count == 2
+
+        # Text ingest invalidates the collection
+        await service.ingest_texts([("new text", "s1")], 7, "alice")
+        await service.retrieve_documents("q1", 7, "alice")
+        assert retriever.ainvoke.await_count == 3
+
+        # URL ingest invalidates the collection
+        with patch("mul_in_one_nemo.service.rag_service.scrape") as mock_scrape, \
+             patch("mul_in_one_nemo.service.rag_service.CACHE_BASE_PATH", str(tmp_path / "rag_cache")):
+            mock_scrape.return_value = ([{"url": "http://example.com", "html": "<p>page</p>"}], [])
+            await service.ingest_url(AnyHttpUrl("http://example.com"), 7, "alice")
+        await service.retrieve_documents("q1", 7, "alice")
+        assert retriever.ainvoke.await_count == 4
+
+        # Deleting by source invalidates the collection
+        with patch("pymilvus.utility.has_collection", return_value=False):
+            await service.delete_documents_by_source(7, "alice", "s1")
+        await service.retrieve_documents("q1", 7, "alice")
+        assert retriever.ainvoke.await_count == 5
+
+        # Another persona's collection is unaffected by those writes
+        await service.retrieve_documents("q1", 8, "alice")
+        await service.retrieve_documents("q1", 8, "alice")
+        assert retriever.ainvoke.await_count == 6
+
+        # LRU: with room for two entries, touching q1/8 keeps it and evicts q1/7
+        await service.retrieve_documents("q1", 8, "alice")
+        await service.retrieve_documents("q2", 8, "alice")
+        assert retriever.ainvoke.await_count == 7
+        await service.retrieve_documents("q1", 8, "alice")
+        assert retriever.ainvoke.await_count == 7
+        await service.retrieve_documents("q1", 7, "alice")
+        assert retriever.ainvoke.await_count == 8
@@ -7,6 +7,7 @@ import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from pydantic import AnyHttpUrl # Import AnyHttpUrl for the mock
+from langchain_core.documents import Document
 
 SRC_DIR = Path(__file__).resolve().parents[1] / "src"
 if str(SRC_DIR) not in sys.path:
@@ -30,6 +31,23 @@ class MockRAGService:
             raise RuntimeError("Failed to scrape invalid.url")
         return {"status": "success", "documents_added": 10, "collection_name": f"persona_{persona_id}_rag"}
 
+    async def ingest_texts(self, items: list, persona_id: int, username: str, commit_every: int | None = None) -> dict:
+        if any(not text.strip() for text, _ in items):
+            raise ValueError("Text content is empty or contains only whitespace")
+        return {
+            "status": "success",
+            "documents_added": len(items),
+            "collection_name": f"u_{username}_persona_{persona_id}_rag",
+        }
+
+    async def retrieve_documents(self, query: str, persona_id: int, username: str, top_k: int = 4) -> list[Document]:
+        if query == "boom":
+            raise RuntimeError("retrieval failed")
+        return [Document(page_content=f"{query}-{i}", metadata={"source": f"src_{i}"}) for i in range(top_k)]
+
+    async def list_sources(self, persona_id: int, username: str) -> list[str]:
+        return ["qa_dataset_1", "qa_dataset_2"]
+
 def get_mock_rag_service():
     return MockRAGService()
 
@@ -253,4 +271,69 @@ def test_ingest_persona_data(persona_test_client: TestClient) -> None:
         f"/api/personas/{persona_id}/ingest", json=ingest_payload_fail
     )
     assert response_fail.status_code == 500
-    assert "Failed to scrape invalid.url" in response_fail.json()["detail"]
\ No newline at end of file
+    assert "Failed to scrape invalid.url" in response_fail.json()["detail"]
+
+def test_ingest_text_batch(persona_test_client: TestClient) -> None:
+    payload = {
+        "items": [
+            {"text": "Question: a\nAnswer: b", "source": "qa_dataset_1"},
+            {"text": "Question: c\nAnswer: d"},
+        ]
+    }
+    response = persona_test_client.post(
+        "/api/personas/personas/7/ingest_text_batch", params={"username": "alice"}, json=payload
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["documents_added"] == 2
+    assert data["collection_name"] == "u_alice_persona_7_rag"
+
+    empty_resp = persona_test_client.post(
+        "/api/personas/personas/7/ingest_text_batch", params={"username": "alice"}, json={"items": []}
+    )
+    assert empty_resp.status_code == 422
+
+    bad_commit_resp = persona_test_client.post(
+        "/api/personas/personas/7/ingest_text_batch",
+        params={"username": "alice"},
+        json={"items": [{"text": "x"}], "commit_every": 0},
+    )
+    assert bad_commit_resp.status_code == 422
+
+    blank_resp = persona_test_client.post(
+        "/api/personas/personas/7/ingest_text_batch",
+        params={"username": "alice"},
+        json={"items": [{"text": "   "}]},
+    )
+    assert blank_resp.status_code == 500
+
+
+def test_list_persona_sources(persona_test_client: TestClient) -> None:
+    response = persona_test_client.get("/api/personas/personas/7/sources", params={"username": "alice"})
+    assert response.status_code == 200
+    assert response.json() == {"sources": ["qa_dataset_1", "qa_dataset_2"], "total": 2}
+
+    missing_user = persona_test_client.get("/api/personas/personas/7/sources")
+    assert missing_user.status_code == 422
+
+
+def test_retrieve_documents_batch(persona_test_client: TestClient) -> None:
+    response = persona_test_client.post(
+        "/api/personas/personas/7/rag/retrieve_batch",
+        params={"username": "alice", "top_k": 2},
+        json={"queries": ["q1", "q2"]},
+    )
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [r["total_retrieved"] for r in results] == [2, 2]
+    assert results[1]["passages"][0] == {"text": "q2-0", "source": "src_0"}
+
+    empty_resp = persona_test_client.post(
+        "/api/personas/personas/7/rag/retrieve_batch", params={"username": "alice"}, json={"queries": []}
+    )
+    assert empty_resp.status_code == 422
+
+    failed_resp = persona_test_client.post(
+        "/api/personas/personas/7/rag/retrieve_batch", params={"username": "alice"}, json={"queries": ["ok", "boom"]}
+    )
+    assert failed_resp.status_code == 500